@@ -0,0 +1,114 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import interpret
+from benchmarks.generate import WORKLOADS
+
+def load(data):
+    return interpret.decode(interpret.load(io.BytesIO(data)))
+
+def execute(code, stats=None):
+    out = interpret.Output(io.StringIO())
+    inp = interpret.Input(io.StringIO(""))
+    interpret.run(code, out, inp, stats)
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def prepare(code, optimize=False, translate=False):
+    return interpret.prepare(code, optimize, translate)[0]
+
+def measure(name, size, repeat, optimize=False, translate=False):
+    data = WORKLOADS[name](size).xml().encode()
+    loadtime = best(lambda: load(data), repeat)
+    code = load(data)
+
+    stats = interpret.Stats(os.devnull)
+    execute(code, stats)
+    executed = sum(stats.counts)
+
+    code = prepare(code, optimize, translate)
+    runtime = best(lambda: execute(code), repeat)
+
+    tracemalloc.start()
+    execute(prepare(load(data), optimize, translate))
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "size": size,
+        "instructions": executed,
+        "load": loadtime,
+        "run": runtime,
+        "ips": executed / runtime if runtime else 0.0,
+        "memory": memory,
+    }
+
+def compare(results, previous, threshold):
+    regressed = False
+    for name, result in results["workloads"].items():
+        old = previous.get("workloads", {}).get(name)
+        if old is None or not old["ips"]:
+            continue
+        ratio = result["ips"] / old["ips"]
+        mark = ""
+        if ratio < 1 - threshold:
+            mark = "  REGRESSION"
+            regressed = True
+        print(f"{name:<12}{old['ips']:>14.0f} -> {result['ips']:>14.0f} ips  x{ratio:.2f}{mark}")
+    return regressed
+
+def arg_parse():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("workloads", nargs="*", help="Workloads to run (default: all)")
+    parser.add_argument("--size", type=int, default=100000, help="Iterations per workload")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions, best is reported")
+    parser.add_argument("--optimize", action="store_true", help="Run the type-specialized, peephole-optimized instruction table")
+    parser.add_argument("--compile", action="store_true", help="Run the program translated into a Python function")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--compare", help="Compare against previously saved JSON results")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown when comparing")
+    args = parser.parse_args()
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error(f"unknown workload {name}, choose from {', '.join(WORKLOADS)}")
+    return args
+
+if __name__ == "__main__":
+    args = arg_parse()
+    results = {
+        "python": platform.python_version(),
+        "optimize": args.optimize,
+        "compile": args.compile,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "workloads": {},
+    }
+    print(f"{'workload':<12}{'instructions':>14}{'load ms':>10}{'run ms':>10}{'ips':>14}{'peak KiB':>10}")
+    for name in args.workloads or WORKLOADS:
+        result = measure(name, args.size, args.repeat, args.optimize, args.compile)
+        results["workloads"][name] = result
+        print(f"{name:<12}{result['instructions']:>14}{result['load'] * 1000:>10.1f}"
+              f"{result['run'] * 1000:>10.1f}{result['ips']:>14.0f}{result['memory'] // 1024:>10}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        if compare(results, previous, args.threshold):
+            sys.exit(1)
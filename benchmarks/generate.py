@@ -0,0 +1,122 @@
+from xml.sax.saxutils import escape
+
+FRAMES = ("GF", "LF", "TF")
+
+class Program:
+    def __init__(self):
+        self.instructions = []
+
+    def add(self, opcode, *args):
+        self.instructions.append((opcode, args))
+
+    def xml(self):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode22">']
+        for order, (opcode, args) in enumerate(self.instructions, 1):
+            lines.append(f'  <instruction order="{order}" opcode="{opcode}">')
+            for i, arg in enumerate(args, 1):
+                prefix, value = arg.split("@", 1)
+                if prefix in FRAMES:
+                    prefix, value = "var", arg
+                lines.append(f'    <arg{i} type="{prefix}">{escape(value)}</arg{i}>')
+            lines.append("  </instruction>")
+        lines.append("</program>")
+        return "\n".join(lines) + "\n"
+
+def loop(n):
+    p = Program()
+    p.add("DEFVAR", "GF@i")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("LABEL", "label@loop")
+    p.add("ADD", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@loop", "GF@i", f"int@{n}")
+    return p
+
+def recursion(n):
+    p = Program()
+    p.add("DEFVAR", "GF@depth")
+    p.add("MOVE", "GF@depth", "int@0")
+    p.add("CALL", "label@rec")
+    p.add("JUMP", "label@end")
+    p.add("LABEL", "label@rec")
+    p.add("ADD", "GF@depth", "GF@depth", "int@1")
+    p.add("JUMPIFEQ", "label@done", "GF@depth", f"int@{n}")
+    p.add("CALL", "label@rec")
+    p.add("LABEL", "label@done")
+    p.add("RETURN")
+    p.add("LABEL", "label@end")
+    return p
+
+def strings(n):
+    p = Program()
+    p.add("DEFVAR", "GF@s")
+    p.add("MOVE", "GF@s", "string@")
+    p.add("DEFVAR", "GF@i")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("DEFVAR", "GF@c")
+    p.add("LABEL", "label@build")
+    p.add("CONCAT", "GF@s", "GF@s", "string@ab")
+    p.add("ADD", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@build", "GF@i", f"int@{n}")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("LABEL", "label@scan")
+    p.add("GETCHAR", "GF@c", "GF@s", "GF@i")
+    p.add("ADD", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@scan", "GF@i", f"int@{n}")
+    p.add("WRITE", "GF@c")
+    return p
+
+def chars(n):
+    p = Program()
+    p.add("DEFVAR", "GF@s")
+    p.add("MOVE", "GF@s", "string@")
+    p.add("DEFVAR", "GF@i")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("LABEL", "label@build")
+    p.add("CONCAT", "GF@s", "GF@s", "string@a")
+    p.add("ADD", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@build", "GF@i", f"int@{n}")
+    p.add("LABEL", "label@fill")
+    p.add("SUB", "GF@i", "GF@i", "int@1")
+    p.add("SETCHAR", "GF@s", "GF@i", "string@b")
+    p.add("JUMPIFNEQ", "label@fill", "GF@i", "int@0")
+    p.add("WRITE", "GF@s")
+    return p
+
+def stack(n):
+    p = Program()
+    p.add("DEFVAR", "GF@i")
+    p.add("DEFVAR", "GF@x")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("LABEL", "label@push")
+    p.add("PUSHS", "GF@i")
+    p.add("ADD", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@push", "GF@i", f"int@{n}")
+    p.add("LABEL", "label@pop")
+    p.add("POPS", "GF@x")
+    p.add("SUB", "GF@i", "GF@i", "int@1")
+    p.add("JUMPIFNEQ", "label@pop", "GF@i", "int@0")
+    return p
+
+def frames(n):
+    p = Program()
+    p.add("DEFVAR", "GF@i")
+    p.add("MOVE", "GF@i", "int@0")
+    p.add("LABEL", "label@churn")
+    p.add("CREATEFRAME")
+    p.add("DEFVAR", "TF@a")
+    p.add("MOVE", "TF@a", "GF@i")
+    p.add("PUSHFRAME")
+    p.add("ADD", "LF@a", "LF@a", "int@1")
+    p.add("POPFRAME")
+    p.add("MOVE", "GF@i", "TF@a")
+    p.add("JUMPIFNEQ", "label@churn", "GF@i", f"int@{n}")
+    return p
+
+WORKLOADS = {
+    "loop": loop,
+    "recursion": recursion,
+    "strings": strings,
+    "chars": chars,
+    "stack": stack,
+    "frames": frames,
+}
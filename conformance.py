@@ -0,0 +1,177 @@
+import io
+import os
+import json
+import sys
+import time
+import signal
+import difflib
+import argparse
+import traceback
+import multiprocessing
+from xml.etree import ElementTree
+
+import interpret
+
+class Timeout(Exception):
+    pass
+
+def alarm(signum, frame):
+    raise Timeout()
+
+def discover(directory, recursive):
+    cases = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".src"):
+                cases.append(os.path.join(root, file[:-4]))
+        if not recursive:
+            break
+    return cases
+
+def expected_rc(base):
+    try:
+        with open(base + ".rc") as file:
+            return int(file.read().strip() or 0)
+    except OSError:
+        return 0
+
+def expected_output(base):
+    try:
+        with open(base + ".out", newline="") as file:
+            return file.read()
+    except OSError:
+        return ""
+
+def expected_stats(base):
+    try:
+        with open(base + ".stats") as file:
+            return json.load(file)
+    except OSError:
+        return None
+
+def case_limits(base):
+    parser = argparse.ArgumentParser(prog=base + ".args")
+    interpret.limit_arguments(parser)
+    try:
+        with open(base + ".args") as file:
+            args = parser.parse_args(file.read().split())
+    except OSError:
+        args = parser.parse_args([])
+    interpret.limit_values(args)
+    return args.limits
+
+def run_case(base, timeout, optimize=False, compile=False):
+    out = io.StringIO()
+    err = io.StringIO()
+    limits = case_limits(base)
+    counted = expected_stats(base)
+    stats = None if counted is None else interpret.Stats()
+    signal.signal(signal.SIGALRM, alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    status = None
+    rc = 0
+    start = time.perf_counter()
+    try:
+        code, orders = interpret.prepare(interpret.load_program(base + ".src"), optimize, compile, limits, stats is not None)
+        if os.path.exists(base + ".in"):
+            inp = interpret.MappedInput(base + ".in")
+        else:
+            inp = io.StringIO("")
+        rc = interpret.Interpreter(code, inp, out, err, limits, stats).run()
+    except interpret.Error as e:
+        rc = e.code
+        err.write("ERROR: " + e.message + "\n")
+    except Timeout:
+        status = "timeout"
+    except Exception:
+        status = "error"
+        err.write(traceback.format_exc())
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    elapsed = time.perf_counter() - start
+
+    report = None if stats is None or status is not None else stats.report()
+    mismatched = {} if report is None else {key: report.get(key) for key in counted if report.get(key) != counted[key]}
+    expected = expected_rc(base)
+    message = ""
+    if status == "timeout":
+        message = f"Timed out after {timeout}s"
+    elif status == "error":
+        message = err.getvalue()
+    elif rc != expected:
+        status = "failed"
+        message = f"Expected return code {expected}, got {rc}\n{err.getvalue()}"
+    elif rc == 0 and out.getvalue() != expected_output(base):
+        status = "failed"
+        diff = difflib.unified_diff(
+            expected_output(base).splitlines(True), out.getvalue().splitlines(True),
+            base + ".out", "stdout",
+        )
+        message = "".join(list(diff)[:200])
+    elif mismatched:
+        status = "failed"
+        message = f"Expected statistics {json.dumps({key: counted[key] for key in mismatched})}, got {json.dumps(mismatched)}"
+    else:
+        status = "passed"
+    return base, status, expected, rc, elapsed, message
+
+def write_junit(path, directory, results, elapsed):
+    failures = sum(1 for result in results if result[1] in ("failed", "timeout"))
+    errors = sum(1 for result in results if result[1] == "error")
+    suite = ElementTree.Element("testsuite", {
+        "name": os.path.basename(os.path.abspath(directory)),
+        "tests": str(len(results)),
+        "failures": str(failures),
+        "errors": str(errors),
+        "time": f"{elapsed:.3f}",
+    })
+    for base, status, expected, rc, duration, message in results:
+        relative = os.path.relpath(base, directory)
+        case = ElementTree.SubElement(suite, "testcase", {
+            "classname": os.path.dirname(relative).replace(os.sep, ".") or ".",
+            "name": os.path.basename(relative),
+            "time": f"{duration:.3f}",
+        })
+        if status in ("failed", "timeout"):
+            failure = ElementTree.SubElement(case, "failure", {"message": status})
+            failure.text = message
+        elif status == "error":
+            error = ElementTree.SubElement(case, "error", {"message": "interpreter crashed"})
+            error.text = message
+    root = ElementTree.Element("testsuites")
+    root.append(suite)
+    ElementTree.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="Run .src/.in/.out/.rc/.args/.stats conformance tests")
+    parser.add_argument("directory", help="Test directory")
+    parser.add_argument("--recursive", action="store_true", help="Search subdirectories")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-test timeout in seconds")
+    parser.add_argument("--junit", default="junit.xml", help="JUnit XML report path")
+    parser.add_argument("--verbose", action="store_true", help="Print every failure message")
+    parser.add_argument("--optimize", action="store_true", help="Run the folded, specialized and fused instruction table")
+    parser.add_argument("--compile", action="store_true", help="Run programs translated into Python functions")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = arg_parse()
+    cases = discover(args.directory, args.recursive)
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.jobs, maxtasksperchild=100) as pool:
+        results = pool.starmap(run_case, [(base, args.timeout, args.optimize, args.compile) for base in cases], chunksize=1)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for base, status, expected, rc, duration, message in results:
+        counts[status] = counts.get(status, 0) + 1
+        if status != "passed":
+            print(f"{status.upper():<8} {os.path.relpath(base, args.directory)}")
+            if args.verbose:
+                print(message)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{len(results)} tests in {elapsed:.2f}s: {summary or 'nothing to run'}")
+
+    write_junit(args.junit, args.directory, results, elapsed)
+    sys.exit(0 if counts.get("passed", 0) == len(results) else 1)
@@ -1,150 +1,137 @@
 import sys
+import os
+import io
 import argparse
 from xml.etree import ElementTree
 import re
 import operator
+import hashlib
+import marshal
+import json
+import mmap
+import time
+import array
 
-class Instruction:
-    def __init__(self, opcode, order):
-        self.type = opcode
+class Program:
+    def __init__(self):
+        self.opcodes = array.array("B")
+        self.orders = array.array("q")
+        self.starts = array.array("I", [0])
+        self.args = array.array("I")
+        self.pool = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def add(self, opcode, order, args):
         try:
-            self.order = int(order)
-        except ValueError:
-            exit(32, "Value error")
-        self.args = []
+            self.orders.append(order)
+        except OverflowError:
+            self.orders = list(self.orders)
+            self.orders.append(order)
+        self.opcodes.append(OPCODE_IDS.get(opcode.upper(), UNKNOWN_OPCODE))
+        for arg in args:
+            slot = self.index.get(arg)
+            if slot is None:
+                slot = self.index[arg] = len(self.pool)
+                self.pool.append(arg)
+            self.args.append(slot)
+        self.starts.append(len(self.args))
+
+    def operands(self, i):
+        return self.args[self.starts[i]:self.starts[i + 1]]
+
+    def sort(self):
+        order = sorted(range(len(self)), key=self.orders.__getitem__)
+        if all(i == j for i, j in enumerate(order)):
+            return
+        args = array.array("I")
+        starts = array.array("I", [0])
+        for i in order:
+            args.extend(self.operands(i))
+            starts.append(len(args))
+        self.opcodes = array.array("B", (self.opcodes[i] for i in order))
+        orders = [self.orders[i] for i in order]
+        self.orders = array.array("q", orders) if isinstance(self.orders, array.array) else orders
+        self.args = args
+        self.starts = starts
 
-    def add_argument(self, arg_type, arg_value, tag):
-        tag = tag.split("arg")[1]
-        self.args.append(Argument(arg_type, arg_value, tag))
-        self.args.sort(key=operator.attrgetter("tag"))
+class Reference:
+    __slots__ = ("type", "frame", "name")
 
-class Argument:
-    def __init__(self, arg_type, arg_value, tag):
-        self.type = arg_type
-        self.value = arg_value
-        self.tag = tag
+    def __init__(self, frame, name):
+        self.type = "var"
+        self.frame = frame
+        self.name = sys.intern(name)
 
 class Framestack:
     def __init__(self):
+        self.globals = Frame()
+        self.temporary = None
+        self.local = None
         self.frames = []
+        self.peak = 0
+        self.pushes = 0
+        self.pops = 0
 
-    def pushframe(self, frame):
-        if frame.type != "GF" and frame.type != "null":
-            frame.type = "LF"
-            for var in frame.vars:
-                var.frame = "LF"
-        self.frames.append(frame)
-
-    def popframe(self):
-        frame = self.frames.pop()
-        if frame.type == "null":
-            return None
-        elif frame.type != "GF":
-            frame.type = "TF"
-            for var in frame.vars:
-                var.frame = "TF"
-        return frame
-
-    def getvar(self, name, frametype):
-        for frame in reversed(self.frames):
-            if frame.type != frametype:
-                continue
-            var = frame.getvar(name)
-            if var is not None:
-                return var
-        return None
+    def createframe(self):
+        self.temporary = Frame()
 
-    def isglobal(self, varname):
-        for frame in self.frames:
-            if frame.getvar(varname) is not None:
-                if frame.type == "GF":
-                    return True
-                else:
-                    return False
+    def pushframe(self):
+        if self.temporary is None:
+            return False
+        self.frames.append(self.temporary)
+        self.local = self.temporary
+        self.temporary = None
+        self.pushes += 1
+        if len(self.frames) > self.peak:
+            self.peak = len(self.frames)
+        return True
 
-    def updatevar(self, var, frametype):
-        for frame in self.frames:
-            if frame.getvar(var.name) is not None and frame.type == frametype:
-                frame.updatevar(var)
-                return True
-        return False
+    def popframe(self):
+        if self.local is None:
+            return False
+        self.temporary = self.frames.pop()
+        self.local = self.frames[-1] if self.frames else None
+        self.pops += 1
+        return True
 
 class Frame:
-    def __init__(self, type):
-        self.type = type
-        self.vars = []
+    def __init__(self):
+        self.vars = {}
 
-    def defvar(self, name, frame):
-        if frame != self.type:
-            exit(55, "Temporary frame doesn't exist")
-        self.vars.append(Variable(name, self.type))
+    def defvar(self, name):
+        self.vars[name] = Variable(name)
 
     def getvar(self, name):
-        for var in self.vars:
-            if var.name == name:
-                return var
-        return None
-
-    def updatevar(self, newvar):
-        for var in self.vars:
-            if var.name == newvar.name:
-                var = newvar
-                return True
-        return False
+        return self.vars.get(name)
 
 class Variable:
-    def __init__(self, name, frame):
+    __slots__ = ("type", "name", "value")
+
+    def __init__(self, name):
         self.type = None
         self.name = name
-        self.frame = frame
         self.value = None
 
-    def check_type(self):
-        if self.type is not None:
-            self.type = self.type.lower()
-
-        if self.type == "int":
-            try:
-                int(self.value)
-                self.value = str(self.value)
-            except ValueError:
-                exit(32, "Value Error")
-        elif self.type == "bool":
-            try:
-                bool(self.value)
-                self.value = str(self.value).lower()
-            except ValueError:
-                exit(32, "Value Error")
-        elif self.type == "nil":
-            if self.value != "nil":
-                exit(32, "Value Error")
-
 class LabelList:
     def __init__(self):
-        self.labels = []
+        self.labels = {}
 
     def add_label(self, label):
-        self._checkorigin(label.name)
-        self.labels.append(label)
-
-    def get_label(self, name):
-        for label in self.labels:
-            if label.name == name:
-                return label
-        exit(52, "Undefined Label")
-
-    def load_labels(self, instructions):
-        for instr in instructions:
-            if instr.type == "LABEL":
-                arg_count(instr.args, 1)
-                name = instr.args[0].value
-                order = instr.order
-                self.add_label(Label(name, order))
-
-    def _checkorigin(self, name):
-        for label in self.labels:
-            if label.name == name:
-                exit(52, "LABEL two labels with the same name")
+        if label.name in self.labels:
+            exit(52, "LABEL two labels with the same name")
+        self.labels[label.name] = label
+
+    def load_labels(self, program):
+        label = OPCODE_IDS["LABEL"]
+        for i, opcode in enumerate(program.opcodes):
+            if opcode == label:
+                args = program.operands(i)
+                arg_count(args, 1)
+                name = program.pool[args[0]][1]
+                self.add_label(Label(name, program.orders[i]))
 
 class Label:
     def __init__(self, name, order):
@@ -153,62 +140,294 @@ class Label:
 
 class Stack:
     def __init__(self):
-        self.vars = []
+        self.types = []
+        self.values = []
 
     def push(self, type, value):
-        self.vars.append(Symbol(type, value))
+        self.types.append(type)
+        self.values.append(value)
 
     def pop(self):
-        if len(self.vars) == 0:
-            exit(56, "POPS stack is empty")
-        return self.vars.pop()
+        if len(self.types) == 0:
+            exit(56, "Data stack is empty")
+        return self.types.pop(), self.values.pop()
+
+    def clear(self):
+        self.types.clear()
+        self.values.clear()
+
+class Output:
+    def __init__(self, stream, unbuffered=False, limit=65536):
+        self.stream = stream
+        self.unbuffered = unbuffered
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        if self.unbuffered:
+            self.stream.write(text)
+            self.stream.flush()
+            return
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+        self.stream.flush()
+
+class Input:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def readline(self):
+        try:
+            line = self.stream.readline()
+        except UnicodeDecodeError:
+            return None
+        if line == "":
+            return None
+        if line.endswith("\n"):
+            line = line[:-1]
+        return line
+
+class MappedInput:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            try:
+                self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                self.buffer = file.read()
+        self.size = len(self.buffer)
+        self.pos = 0
+
+    def readline(self):
+        if self.pos >= self.size:
+            return None
+        end = self.buffer.find(b"\n", self.pos)
+        if end < 0:
+            end = self.size
+        line = self.buffer[self.pos:end]
+        self.pos = end + 1
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        try:
+            return line.decode()
+        except UnicodeDecodeError:
+            return None
 
 class Symbol:
+    __slots__ = ("type", "value")
+
     def __init__(self, type, value):
-        self.type = type.lower()
+        self.type = type
         self.value = value
 
+ROPE = 1024
+
+class Text:
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __ne__(self, other):
+        return str(self) != str(other)
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    def __gt__(self, other):
+        return str(self) > str(other)
+
+    def __le__(self, other):
+        return str(self) <= str(other)
+
+    def __ge__(self, other):
+        return str(self) >= str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __getitem__(self, index):
+        return str(self)[index]
+
+class Builder:
+    __slots__ = ("parts", "size")
+
+    def __init__(self, text):
+        self.parts = [text]
+        self.size = len(text)
+
+class Rope(Text):
+    __slots__ = ("builder", "size", "text")
+
+    def __init__(self, builder, size):
+        self.builder = builder
+        self.size = size
+        self.text = None
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        if self.text is None:
+            builder = self.builder
+            if len(builder.parts) > 1:
+                builder.parts = ["".join(builder.parts)]
+            text = builder.parts[0]
+            self.text = text if self.size == builder.size else text[:self.size]
+        return self.text
+
+    def append(self, text):
+        builder = self.builder
+        if self.size != builder.size:
+            builder = Builder(str(self))
+        builder.parts.append(text)
+        builder.size += len(text)
+        return Rope(builder, builder.size)
+
+class Chars(Text):
+    __slots__ = ("chars", "owner", "text")
+
+    def __init__(self, text, owner):
+        self.chars = list(text)
+        self.owner = owner
+        self.text = text
+
+    def __len__(self):
+        return len(self.chars)
+
+    def __str__(self):
+        if self.text is None:
+            self.text = "".join(self.chars)
+        return self.text
+
+    def __getitem__(self, index):
+        return self.chars[index]
+
+    def set(self, index, char):
+        self.chars[index] = char
+        self.text = None
+
+def concat(value1, value2):
+    if type(value1) is Rope:
+        return value1.append(str(value2))
+    value1, value2 = str(value1), str(value2)
+    if len(value1) + len(value2) < ROPE:
+        return value1 + value2
+    return Rope(Builder(value1), len(value1)).append(value2)
+
+def share(value):
+    if type(value) is Chars:
+        value.owner = None
+    return value
+
+class Error(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class ArgumentError(Error):
+    pass
+
+class FileError(Error):
+    pass
+
+class FormatError(Error):
+    pass
+
+class StructureError(Error):
+    pass
+
+class SemanticError(Error):
+    pass
+
+class OperandTypeError(Error):
+    pass
+
+class VariableError(Error):
+    pass
+
+class FrameError(Error):
+    pass
+
+class MissingValueError(Error):
+    pass
+
+class OperandValueError(Error):
+    pass
+
+class StringError(Error):
+    pass
+
+class LimitError(Error):
+    pass
+
+ERRORS = {
+    10: ArgumentError,
+    11: FileError,
+    12: FileError,
+    31: FormatError,
+    32: StructureError,
+    52: SemanticError,
+    53: OperandTypeError,
+    54: VariableError,
+    55: FrameError,
+    56: MissingValueError,
+    57: OperandValueError,
+    58: StringError,
+    60: LimitError,
+    61: LimitError,
+    62: LimitError,
+    63: LimitError,
+    64: LimitError,
+    65: LimitError,
+}
+
+class Halt(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
 
 def exit(code, msg):
-    print("ERROR: " + msg, file=sys.stderr)
-    sys.exit(code)
+    raise ERRORS.get(code, Error)(code, msg)
+
+PATTERNS = {
+    "var": (re.compile(r"^(TF|GF|LF)@[a-zA-Z!$%&*_\-?][a-zA-Z0-9!$%&*_\-?]*$"), "Variable"),
+    "string": (re.compile(r"^([^#\s\\]|\\\d{3})*$"), "String"),
+    "int": (re.compile(r"^(\+|\-)?[0-9]+$"), "Integer"),
+    "bool": (re.compile(r"^(true|false)$", re.IGNORECASE), "Bool"),
+    "type": (re.compile(r"^(int|string|bool)$", re.IGNORECASE), "Type"),
+    "label": (re.compile(r"^[a-zA-Z!$%&*_\-?][a-zA-Z0-9!$%&*_\-?]*$"), "Label"),
+    "nil": (re.compile(r"^nil$", re.IGNORECASE), "Nil"),
+}
+
+ARGUMENT = re.compile(r"arg\d")
+ESCAPE = re.compile(r"\\([0-9][0-9][0-9])")
 
 def check_regex(exp, type):
-    type = type.lower()
-    if type == "var":
-        if not re.match(r"^(TF|GF|LF)@[a-zA-Z!$%&*_\-?][a-zA-Z0-9!$%&*_\-?]*$", exp):
-            exit(32, "Variable regex doesn't match")
-    elif type == "string":
-        if not re.match(r"^([^#\s\\]|\\\d{3})*$", exp):
-            exit(32, "String regex doesn't match")
-    elif type == "int":
-        if not re.match(r"^(\+|\-)?[0-9]+$", exp):
-            exit(32, "Integer regex doesn't match")
-    elif type == "bool":
-        if not re.match(r"^(true|false)$", exp.lower()):
-            exit(32, "Bool regex doesn't match")
-    elif type == "type":
-        if not re.match(r"^(int|string|bool)$", exp.lower()):
-            exit(32, "Type regex doesn't match")
-    elif type == "label":
-        if not re.match(r"^[a-zA-Z!$%&*_\-?][a-zA-Z0-9!$%&*_\-?]*$", exp):
-            exit(32, "Label regex doesn't match")
-    elif type == "nil":
-        if not re.match(r"^nil$", exp.lower()):
-            exit(32, "Nil regex doesn't match")
-    else:
+    if type.lower() not in PATTERNS:
         exit(32, "Unexpected Argument Type")
+    pattern, name = PATTERNS[type.lower()]
+    if not pattern.match(exp):
+        exit(32, name + " regex doesn't match")
 
-def check_order(instructions):
-    i = 0
-    for instr in instructions:
-        i += 1
-        if len(instructions) > i:
-            if instr.order == instructions[i].order:
+def check_order(program):
+    orders = program.orders
+    for i in range(len(orders)):
+        if len(orders) > i + 1:
+            if orders[i] == orders[i + 1]:
                 exit(32, "Duplicit order")
-            if int(instr.order) <= 0:
+            if orders[i] <= 0:
                 exit(32, "Negative order")
-        instr.order = i
+    program.orders = array.array("q", range(1, len(orders) + 1))
 
 def type_check(arg1, arg2, types):
     if arg1 != arg2:
@@ -220,65 +439,44 @@ def type_check(arg1, arg2, types):
             return
     exit(53, "Invalid data types")
 
-def getvar(arg, frame, stack):
-    try:
-        frametype, name = arg.value.split("@", 1)
-    except ValueError:
-        exit(32, "Value Error")
-    if frametype == "TF":
-        if frame is None or frame.type == "GF":
-            exit(55, "Frame doesn't exist")
-        var = frame.getvar(name)
-        if var is None:
-            exit(54, "Variable doesn't exist")
+def getframe(ref, st):
+    if ref.frame == "GF":
+        frame = st.stack.globals
+    elif ref.frame == "LF":
+        frame = st.stack.local
     else:
-        if frame is not None and frame.type == "GF" and frametype == "GF":
-            var = frame.getvar(name)
-            if var is None:
-                exit(54, "Variable doesn't exist")
-            return var
-        if len(stack.frames) <= 2:
-            exit(55, "Frame doesn't exist")
-        var = stack.getvar(name, frametype)
-        if var is None:
-            exit(54, "Variable doesn't exist")
-    return var
+        frame = st.stack.temporary
+    if frame is None:
+        exit(55, "Frame doesn't exist")
+    return frame
 
-def updatevar(var, frame, stack):
-    var.check_type()
-    if var.frame == "TF":
-        if not frame.updatevar(var):
-            exit(54, "Variable doesn't exist")
-    else:
-        if frame.type == "GF" and var.frame == "GF":
-            if not frame.updatevar(var):
-                exit(54, "Variable doesn't exist")
-            return
-        if not stack.updatevar(var, var.frame):
-            exit(54, "Variable doesn't exist")
+def getvar(ref, st):
+    var = getframe(ref, st).vars.get(ref.name)
+    if var is None:
+        exit(54, "Variable doesn't exist")
+    return var
 
-def getvalue(arg, frame, stack):
+def symbol(arg, st):
     if arg.type == "var":
-        value = getvar(arg, frame, stack).value
-        if value is None:
-            exit(56, "No value")
-        return value
-    else:
-        typ = gettype(arg, frame, stack)
-        var = Variable("name", "")
-        var.value = arg.value
-        var.type = typ
-        var.check_type()
-        if arg.value is None:
+        var = getvar(arg, st)
+        if var.type is None:
             exit(56, "No value")
-        return arg.value
+        return var
+    return arg
 
-def gettype(arg, frame, stack):
+def gettype(arg, st):
     if arg.type == "var":
-        return getvar(arg, frame, stack).type
+        return getvar(arg, st).type
     else:
         return arg.type
 
+def tostring(typ, value):
+    if typ == "bool":
+        return "true" if value else "false"
+    elif typ == "nil":
+        return ""
+    return str(value)
+
 def arg_count(args, expected):
     if len(args) != expected:
         exit(32, "Invalid number of arguments")
@@ -287,374 +485,2017 @@ def arg_parse():
     parser = argparse.ArgumentParser()
     parser.add_argument("--source", nargs=1, help="XML Source File")
     parser.add_argument("--input", nargs=1, help="Input file")
+    parser.add_argument("--cache", nargs=1, help="Compiled program cache directory")
+    parser.add_argument("--flush", action="store_true", help="Flush output after every WRITE")
+    parser.add_argument("--stats", nargs=1, help="Write execution statistics to file")
+    parser.add_argument("--optimize", action="store_true", help="Fold constants, specialize type-safe instructions, drop labels and fuse common sequences")
+    parser.add_argument("--compile", action="store_true", help="Translate the program into a Python function")
+    parser.add_argument("--memory", nargs=1, help="Write a memory usage report to file")
+    parser.add_argument("--profile", nargs=1, help="Write a call-graph profile in collapsed-stack format to file")
+    parser.add_argument("--speedscope", nargs=1, help="Write a call-graph profile in speedscope JSON format to file")
+    parser.add_argument("--trace", nargs=1, type=int, help="Keep the last N instructions and dump them on runtime errors")
+    limit_arguments(parser)
 
     args = parser.parse_args()
 
     if args.source is None and args.input is None:
         exit(32, "Both arguments missing")
 
-    if args.source is None:
-        return sys.stdin, args.input[0]
-    elif args.input is None:
-        return args.source[0], sys.stdin
+    args.source = sys.stdin if args.source is None else args.source[0]
+    args.input = sys.stdin if args.input is None else args.input[0]
+    args.cache = None if args.cache is None else args.cache[0]
+    args.stats = None if args.stats is None else args.stats[0]
+    args.trace = None if args.trace is None else args.trace[0]
+    if args.trace is not None and args.trace <= 0:
+        exit(10, "Trace size must be positive")
+    args.profile = None if args.profile is None else args.profile[0]
+    args.speedscope = None if args.speedscope is None else args.speedscope[0]
+    if args.trace is not None and args.stats is not None:
+        exit(10, "--trace and --stats can't be combined")
+    if (args.profile is not None or args.speedscope is not None) and (args.stats is not None or args.trace is not None):
+        exit(10, "Profiling can't be combined with --stats or --trace")
+    limit_values(args)
+    if args.memory is not None:
+        if args.limits is None:
+            args.limits = Limits()
+        args.limits.usage = Memory(args.memory[0])
+    return args
+
+def limit_arguments(parser):
+    parser.add_argument("--max-instructions", nargs=1, type=int, help="Stop after about this many instructions")
+    parser.add_argument("--max-time", nargs=1, type=float, help="Stop after this many seconds")
+    parser.add_argument("--max-depth", nargs=1, type=int, help="Maximum CALL nesting depth")
+    parser.add_argument("--max-stack", nargs=1, type=int, help="Maximum data stack depth")
+    parser.add_argument("--max-string", nargs=1, type=int, help="Maximum characters held in string values")
+    parser.add_argument("--max-memory", nargs=1, type=int, help="Soft cap on estimated interpreter memory in bytes")
+
+def limit_values(args):
+    values = []
+    for name in ("max_instructions", "max_time", "max_depth", "max_stack", "max_string", "max_memory"):
+        value = getattr(args, name)
+        values.append(None if value is None else value[0])
+    args.limits = None if all(value is None for value in values) else Limits(*values)
+
+def parse_instruction(elem, program):
+    if elem.tag != "instruction":
+        exit(32, "Invalid XML instruction")
+
+    attr = elem.attrib.keys()
 
-    return args.source[0], args.input[0]
+    if "opcode" not in attr or "order" not in attr:
+        exit(32, "Invalid XML instruction")
+
+    order, opcode = elem.attrib["order"], elem.attrib["opcode"]
+    try:
+        order = int(order)
+    except ValueError:
+        exit(32, "Value error")
+
+    args = []
+    for arg in elem:
+        if not ARGUMENT.match(arg.tag):
+            exit(32, "Invalid XML argument")
+        if "type" not in arg.attrib:
+            exit(32, "Invalid XML argument")
+        type, value = arg.attrib["type"].lower(), arg.text
+        if value is None:
+            value = ""
+        check_regex(value, type)
+        if type == "string":
+            value = ESCAPE.sub(lambda tmp: chr(int(tmp.group(1))), value)
+        args.append((arg.tag.split("arg")[1], type, sys.intern(value)))
+    args.sort(key=operator.itemgetter(0))
+
+    i = 0
+    for tag, type, value in args:
+        i += 1
+        if tag != str(i):
+            exit(32, "Argument missing")
+
+    program.add(opcode, order, [(type, value) for tag, type, value in args])
 
 def xml_parse(tree):
     root = tree.getroot()
-    instructions = []
+    program = Program()
 
     if root.tag != "program":
         exit(32, "Invalid XML root element")
 
     for elem in root:
-        if elem.tag != "instruction":
-            exit(32, "Invalid XML instruction")
+        parse_instruction(elem, program)
 
-        attr = elem.attrib.keys()
+    return program
 
-        if "opcode" not in attr or "order" not in attr:
-            exit(32, "Invalid XML instruction")
+def xml_load(source):
+    program = Program()
+    root = None
+    depth = 0
+    try:
+        for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    if root.tag != "program":
+                        exit(32, "Invalid XML root element")
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                parse_instruction(elem, program)
+                root.clear()
+    except (ElementTree.ParseError, OSError):
+        exit(31, "Invalid XML structure")
+    return program
 
-        order, opcode = elem.attrib["order"], elem.attrib["opcode"]
-        instr = Instruction(opcode, order)
+def load(source):
+    program = xml_load(source)
+    program.sort()
+    check_order(program)
+    return program
 
-        for arg in elem:
-            if not re.match(r"arg\d", arg.tag):
-                exit(32, "Invalid XML argument")
-            type, value = arg.attrib["type"], arg.text
-            try:
-                type = str(type).lower()
-                value = str(value)
-            except TypeError:
-                exit(32, "Type Error")
-            check_regex(value, type)
-            if type == "string":
-                value = re.sub(r"\\([0-9][0-9][0-9])", lambda tmp: chr(int(tmp.group(1))), str(value))
-            instr.add_argument(type, value, arg.tag)
+class State:
+    def __init__(self, out, inp, err=None):
+        self.out = out
+        self.input = inp
+        self.err = sys.stderr if err is None else err
+        self.stack = Framestack()
+        self.globals = self.stack.globals.vars
+        self.datastack = Stack()
+        self.calls = []
+        self.limits = None
 
-        i = 0
-        for arg in instr.args:
-            i += 1
-            if arg.tag != str(i):
-                exit(32, "Argument missing")
+def op_move(st, ip, dst, src):
+    var = getvar(dst, st)
+    sym = symbol(src, st)
+    var.value = share(sym.value)
+    var.type = sym.type
+    return ip + 1
 
-        instructions.append(instr)
+def op_createframe(st, ip):
+    st.stack.createframe()
+    return ip + 1
 
-    return instructions
+def op_pushframe(st, ip):
+    if not st.stack.pushframe():
+        exit(55, "PUSHFRAME undefined frame")
+    return ip + 1
 
-def interpret(instructions, inputfile):
-    stack = Framestack()
-    stack.pushframe(Frame("null"))
-    frame = Frame("GF")
-    labels = LabelList()
-    labels.load_labels(instructions)
-    datastack = Stack()
-    calls = []
-    iter = 0
-    instr = instructions[0]
-    while instr:
-        instr.type = instr.type.upper()
-        if instr.type == "MOVE":
-            arg_count(instr.args, 2)
-            var = getvar(instr.args[0], frame, stack)
-            value = getvalue(instr.args[1], frame, stack)
-            typ = gettype(instr.args[1], frame, stack)
-            var.value = value
-            var.type = typ
-            updatevar(var, frame, stack)
-        elif instr.type == "CREATEFRAME":
-            arg_count(instr.args, 0)
-            if frame is not None and frame.type == "GF":
-                stack.pushframe(frame)
-            frame = Frame("TF")
-        elif instr.type == "PUSHFRAME":
-            arg_count(instr.args, 0)
-            if frame is None or frame.type == "GF":
-                exit(55, "PUSHFRAME undefined frame")
-            stack.pushframe(frame)
-            frame = None
-        elif instr.type == "POPFRAME":
-            arg_count(instr.args, 0)
-            frame = stack.popframe()
-            if frame is None:
-                exit(55, "POPFRAME nonexistent frame")
-        elif instr.type == "DEFVAR":
-            arg_count(instr.args, 1)
-            if frame is None:
-                exit(55, "DEFVAR undefined frame")
-            if frame.getvar(instr.args[0].value.split("@", 1)[1]) is not None:
-                exit(52, "DEFVAR redefining a variable")
-            frame.defvar(instr.args[0].value.split("@", 1)[1], instr.args[0].value.split("@", 1)[0])
-        elif instr.type == "CALL":
-            arg_count(instr.args, 1)
-            calls.append(instr.order - 1)
-            name = instr.args[0].value
-            iter = labels.get_label(name).order - 1
-        elif instr.type == "RETURN":
-            arg_count(instr.args, 0)
-            if len(calls) == 0:
-                exit(56, "RETURN Return without call")
-            iter = calls.pop()
-        elif instr.type == "PUSHS":
-            arg_count(instr.args, 1)
-            typ = gettype(instr.args[0], frame, stack)
-            value = getvalue(instr.args[0], frame, stack)
-            datastack.push(typ, value)
-        elif instr.type == "POPS":
-            arg_count(instr.args, 1)
-            var = getvar(instr.args[0], frame, stack)
-            pop = datastack.pop()
-            var.type = pop.type
-            var.value = pop.value
-            updatevar(var, frame, stack)
-        elif \
-        instr.type == "ADD" or \
-        instr.type == "SUB" or \
-        instr.type == "MUL" or \
-        instr.type == "IDIV":
-            arg_count(instr.args, 3)
-            type1 = gettype(instr.args[1], frame, stack)
-            type2 = gettype(instr.args[2], frame, stack)
-            value1 = getvalue(instr.args[1], frame, stack)
-            value2 = getvalue(instr.args[2], frame, stack)
-            type_check(type1, type2, ["int"])
-            var = getvar(instr.args[0], frame, stack)
-            if instr.type == "ADD":
-                var.value = int(value1) + int(value2)
-            elif instr.type == "SUB":
-                var.value = int(value1) - int(value2)
-            elif instr.type == "MUL":
-                var.value = int(value1) * int(value2)
-            elif instr.type == "IDIV":
-                if int(value2) == 0:
-                    exit(57, "IDIV divison by zero")
-                var.value = int(value1) / int(value2)
-            var.value = int(var.value)
-            var.type = "int"
-            updatevar(var, frame, stack)
-        elif \
-        instr.type == "LT" or \
-        instr.type == "GT" or \
-        instr.type == "EQ":
-            arg_count(instr.args, 3)
-            type1 = gettype(instr.args[1], frame, stack)
-            type2 = gettype(instr.args[2], frame, stack)
-            value1 = getvalue(instr.args[1], frame, stack)
-            value2 = getvalue(instr.args[2], frame, stack)
-            type_check(type1, type2, ["int", "bool", "string"])
-            var = getvar(instr.args[0], frame, stack)
-            if instr.type == "LT":
-                if type1 == "int":
-                    var.value = int(value1) < int(value2)
-                elif type1 == "bool":
-                    var.value = bool(value1) < bool(value2)
-                elif type1 == "string":
-                    var.value = value1 < value2
-            elif instr.type == "GT":
-                if type1 == "int":
-                    var.value = int(value1) > int(value2)
-                elif type1 == "bool":
-                    var.value = bool(value1) > bool(value2)
-                elif type1 == "string":
-                    var.value = value1 > value2
-            elif instr.type == "EQ":
-                if type1 == "int":
-                    var.value = int(value1) == int(value2)
-                elif type1 == "bool":
-                    var.value = bool(value1) == bool(value2)
-                elif type1 == "string":
-                    var.value = value1 == value2
-            var.type = "bool"
-            updatevar(var, frame, stack)
-        elif \
-        instr.type == "AND" or \
-        instr.type == "OR":
-            arg_count(instr.args, 3)
-            type_check(gettype(instr.args[1], frame, stack), gettype(instr.args[2], frame, stack), ["bool"])
-            var = getvar(instr.args[0], frame, stack)
-            value1 = getvalue(instr.args[1], frame, stack)
-            value2 = getvalue(instr.args[2], frame, stack)
-            if instr.type == "AND":
-                var.value = bool(value1) and bool(value2)
-            elif instr.type == "OR":
-                var.value = bool(value1) or bool(value2)
-            var.type = "bool"
-            updatevar(var, frame, stack)
-        elif instr.type == "NOT":
-            arg_count(instr.args, 2)
-            var = getvar(instr.args[0], frame, stack)
-            if gettype(instr.args[1], frame, stack) != "bool":
-                exit(53, "Invalid data type")
-            var.value = not bool(getvalue(instr.args[1], frame, stack))
-            var.type = "bool"
-            updatevar(var, frame, stack)
-        elif instr.type == "INT2CHAR":
-            arg_count(instr.args, 2)
-            var = getvar(instr.args[0], frame, stack)
-            value = getvalue(instr.args[1], frame, stack)
-            if gettype(instr.args[1], frame, stack) != "int":
-                exit(53, "Invalid data type")
-            try:
-                var.value = chr(int(value))
-            except ValueError:
-                exit(58, "INT2CHAR unicode out of range")
-            var.type = "string"
-            updatevar(var, frame, stack)
-        elif instr.type == "STRI2INT":
-            arg_count(instr.args, 3)
-            var = getvar(instr.args[0], frame, stack)
-            index = getvalue(instr.args[2], frame, stack)
-            value = getvalue(instr.args[1], frame, stack)
-            if gettype(instr.args[2], frame, stack) != "int" or gettype(instr.args[1], frame, stack) != "string":
-                exit(53, "Invalid data type")
-            if len(value) <= index:
-                exit(58, "STRI2INT index out of range")
-            var.value = ord(value[int(index)])
-            var.type = "int"
-            updatevar(var, frame, stack)
-        elif instr.type == "READ":
-            arg_count(instr.args, 2)
-            var = getvar(instr.args[0], frame, stack)
-            typ = instr.args[1].value
-            if typ != "string" and typ != "int" and typ != "bool":
-                exit(32, "READ wrong type argument")
-            try:
-                value = input()
-            except Exception:
-                value = "nil"
-                typ = "nil"
-            if typ == "bool":
-                if value != "true":
-                    value = "false"
-            var.type = typ
-            var.value = value
-            updatevar(var, frame, stack)
-        elif instr.type == "WRITE":
-            arg_count(instr.args, 1)
-            arg = instr.args[0]
-            typ = gettype(arg, frame, stack)
-            value = getvalue(arg, frame, stack)
+def op_popframe(st, ip):
+    if not st.stack.popframe():
+        exit(55, "POPFRAME nonexistent frame")
+    return ip + 1
+
+def op_defvar(st, ip, dst):
+    frame = getframe(dst, st)
+    if frame.getvar(dst.name) is not None:
+        exit(52, "DEFVAR redefining a variable")
+    frame.defvar(dst.name)
+    return ip + 1
+
+def op_call(st, ip, target):
+    st.calls.append(ip)
+    return target
+
+def op_return(st, ip):
+    if len(st.calls) == 0:
+        exit(56, "RETURN Return without call")
+    return st.calls.pop() + 1
+
+def op_pushs(st, ip, src):
+    sym = symbol(src, st)
+    st.datastack.push(sym.type, share(sym.value))
+    return ip + 1
+
+def op_pops(st, ip, dst):
+    var = getvar(dst, st)
+    var.type, var.value = st.datastack.pop()
+    return ip + 1
+
+def arithmetic(st, dst, src1, src2):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, ["int"])
+    return getvar(dst, st), sym1.value, sym2.value
+
+def op_add(st, ip, dst, src1, src2):
+    var, value1, value2 = arithmetic(st, dst, src1, src2)
+    var.value = value1 + value2
+    var.type = "int"
+    return ip + 1
+
+def op_sub(st, ip, dst, src1, src2):
+    var, value1, value2 = arithmetic(st, dst, src1, src2)
+    var.value = value1 - value2
+    var.type = "int"
+    return ip + 1
+
+def op_mul(st, ip, dst, src1, src2):
+    var, value1, value2 = arithmetic(st, dst, src1, src2)
+    var.value = value1 * value2
+    var.type = "int"
+    return ip + 1
+
+def divide(value1, value2):
+    if value2 == 0:
+        exit(57, "IDIV divison by zero")
+    quotient = abs(value1) // abs(value2)
+    return quotient if (value1 < 0) == (value2 < 0) else -quotient
+
+def op_idiv(st, ip, dst, src1, src2):
+    var, value1, value2 = arithmetic(st, dst, src1, src2)
+    var.value = divide(value1, value2)
+    var.type = "int"
+    return ip + 1
+
+def relational(st, dst, src1, src2, compare):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, ["int", "bool", "string"])
+    var = getvar(dst, st)
+    var.value = compare(sym1.value, sym2.value)
+    var.type = "bool"
+
+def op_lt(st, ip, dst, src1, src2):
+    relational(st, dst, src1, src2, operator.lt)
+    return ip + 1
+
+def op_gt(st, ip, dst, src1, src2):
+    relational(st, dst, src1, src2, operator.gt)
+    return ip + 1
+
+def op_eq(st, ip, dst, src1, src2):
+    relational(st, dst, src1, src2, operator.eq)
+    return ip + 1
+
+def op_and(st, ip, dst, src1, src2):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, ["bool"])
+    var = getvar(dst, st)
+    var.value = sym1.value and sym2.value
+    var.type = "bool"
+    return ip + 1
+
+def op_or(st, ip, dst, src1, src2):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, ["bool"])
+    var = getvar(dst, st)
+    var.value = sym1.value or sym2.value
+    var.type = "bool"
+    return ip + 1
+
+def op_not(st, ip, dst, src):
+    var = getvar(dst, st)
+    sym = symbol(src, st)
+    if sym.type != "bool":
+        exit(53, "Invalid data type")
+    var.value = not sym.value
+    var.type = "bool"
+    return ip + 1
+
+def op_int2char(st, ip, dst, src):
+    var = getvar(dst, st)
+    sym = symbol(src, st)
+    if sym.type != "int":
+        exit(53, "Invalid data type")
+    try:
+        var.value = chr(sym.value)
+    except (ValueError, OverflowError):
+        exit(58, "INT2CHAR unicode out of range")
+    var.type = "string"
+    return ip + 1
+
+def op_stri2int(st, ip, dst, src1, src2):
+    var = getvar(dst, st)
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    if sym1.type != "string" or sym2.type != "int":
+        exit(53, "Invalid data type")
+    value, index = sym1.value, sym2.value
+    if index < 0 or len(value) <= index:
+        exit(58, "STRI2INT index out of range")
+    var.value = ord(value[index])
+    var.type = "int"
+    return ip + 1
+
+def op_read(st, ip, dst, typearg):
+    var = getvar(dst, st)
+    typ = typearg.value
+    if typ != "string" and typ != "int" and typ != "bool":
+        exit(32, "READ wrong type argument")
+    value = st.input.readline()
+    if value is None:
+        typ = "nil"
+    elif typ == "bool":
+        value = value == "true"
+    elif typ == "int":
+        try:
+            value = int(value)
+        except ValueError:
+            exit(32, "Value Error")
+    var.type = typ
+    var.value = value
+    return ip + 1
+
+def op_write(st, ip, src):
+    sym = symbol(src, st)
+    st.out.write(tostring(sym.type, sym.value))
+    return ip + 1
+
+def op_concat(st, ip, dst, src1, src2):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, ["string"])
+    var = getvar(dst, st)
+    var.value = concat(sym1.value, sym2.value)
+    var.type = "string"
+    return ip + 1
+
+def op_strlen(st, ip, dst, src):
+    sym = symbol(src, st)
+    if sym.type != "string":
+        exit(53, "Invalid data type")
+    var = getvar(dst, st)
+    var.value = len(sym.value)
+    var.type = "int"
+    return ip + 1
+
+def op_getchar(st, ip, dst, src1, src2):
+    var = getvar(dst, st)
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    if sym1.type != "string" or sym2.type != "int":
+        exit(53, "Invalid data type")
+    value, index = sym1.value, sym2.value
+    if index < 0 or len(value) <= index:
+        exit(58, "GETCHAR index out of range")
+    var.value = value[index]
+    var.type = "string"
+    return ip + 1
+
+def op_setchar(st, ip, dst, src1, src2):
+    var = getvar(dst, st)
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    index, value = sym1.value, sym2.value
+    if sym1.type != "int" or sym2.type != "string" or var.type != "string":
+        exit(53, "Invalid data type")
+    if index < 0 or len(var.value) <= index or len(value) == 0:
+        exit(58, "SETCHAR index out of range")
+    text = var.value
+    if type(text) is not Chars or text.owner is not var:
+        text = var.value = Chars(str(text), var)
+    text.set(index, value[0])
+    return ip + 1
+
+def op_type(st, ip, dst, src):
+    var = getvar(dst, st)
+    typ = gettype(src, st)
+    if typ is None:
+        typ = ""
+    var.value = typ
+    var.type = "string"
+    return ip + 1
+
+def op_label(st, ip, label):
+    return ip + 1
+
+def op_jump(st, ip, target):
+    return target
+
+def conditional(st, src1, src2):
+    sym1 = symbol(src1, st)
+    sym2 = symbol(src2, st)
+    type_check(sym1.type, sym2.type, [])
+    return sym1.value == sym2.value
+
+def op_jumpifeq(st, ip, target, src1, src2):
+    if conditional(st, src1, src2):
+        return target
+    return ip + 1
+
+def op_jumpifneq(st, ip, target, src1, src2):
+    if not conditional(st, src1, src2):
+        return target
+    return ip + 1
+
+def op_undefined(st, ip):
+    exit(52, "Undefined Label")
+
+def op_exit(st, ip, src):
+    sym = symbol(src, st)
+    if sym.type != "int":
+        exit(53, "Invalid data type")
+    value = sym.value
+    if value >= 0 and value <= 49:
+        raise Halt(value)
+    else:
+        exit(57, "EXIT incorrect exit code")
+
+def op_dprint(st, ip, src):
+    sym = symbol(src, st)
+    print("nil" if sym.type == "nil" else tostring(sym.type, sym.value), file=st.err)
+    return ip + 1
+
+def op_break(st, ip, order):
+    print(f"Current instruction: {order}", file=st.err)
+    return ip + 1
+
+def popboth(st, types):
+    type2, value2 = st.datastack.pop()
+    type1, value1 = st.datastack.pop()
+    type_check(type1, type2, types)
+    return value1, value2
+
+def op_adds(st, ip):
+    value1, value2 = popboth(st, ["int"])
+    st.datastack.push("int", value1 + value2)
+    return ip + 1
+
+def op_subs(st, ip):
+    value1, value2 = popboth(st, ["int"])
+    st.datastack.push("int", value1 - value2)
+    return ip + 1
+
+def op_muls(st, ip):
+    value1, value2 = popboth(st, ["int"])
+    st.datastack.push("int", value1 * value2)
+    return ip + 1
+
+def op_idivs(st, ip):
+    value1, value2 = popboth(st, ["int"])
+    st.datastack.push("int", divide(value1, value2))
+    return ip + 1
+
+def op_lts(st, ip):
+    value1, value2 = popboth(st, ["int", "bool", "string"])
+    st.datastack.push("bool", value1 < value2)
+    return ip + 1
+
+def op_gts(st, ip):
+    value1, value2 = popboth(st, ["int", "bool", "string"])
+    st.datastack.push("bool", value1 > value2)
+    return ip + 1
+
+def op_eqs(st, ip):
+    value1, value2 = popboth(st, ["int", "bool", "string"])
+    st.datastack.push("bool", value1 == value2)
+    return ip + 1
+
+def op_ands(st, ip):
+    value1, value2 = popboth(st, ["bool"])
+    st.datastack.push("bool", value1 and value2)
+    return ip + 1
+
+def op_ors(st, ip):
+    value1, value2 = popboth(st, ["bool"])
+    st.datastack.push("bool", value1 or value2)
+    return ip + 1
+
+def op_nots(st, ip):
+    typ, value = st.datastack.pop()
+    if typ != "bool":
+        exit(53, "Invalid data type")
+    st.datastack.push("bool", not value)
+    return ip + 1
+
+def op_int2chars(st, ip):
+    typ, value = st.datastack.pop()
+    if typ != "int":
+        exit(53, "Invalid data type")
+    try:
+        st.datastack.push("string", chr(value))
+    except (ValueError, OverflowError):
+        exit(58, "INT2CHARS unicode out of range")
+    return ip + 1
+
+def op_stri2ints(st, ip):
+    typ2, index = st.datastack.pop()
+    typ1, value = st.datastack.pop()
+    if typ2 != "int" or typ1 != "string":
+        exit(53, "Invalid data type")
+    if index < 0 or len(value) <= index:
+        exit(58, "STRI2INTS index out of range")
+    st.datastack.push("int", ord(value[index]))
+    return ip + 1
+
+def op_clears(st, ip):
+    st.datastack.clear()
+    return ip + 1
+
+def op_jumpifeqs(st, ip, target):
+    type2, value2 = st.datastack.pop()
+    type1, value1 = st.datastack.pop()
+    type_check(type1, type2, [])
+    if value1 == value2:
+        return target
+    return ip + 1
+
+def op_jumpifneqs(st, ip, target):
+    type2, value2 = st.datastack.pop()
+    type1, value1 = st.datastack.pop()
+    type_check(type1, type2, [])
+    if value1 != value2:
+        return target
+    return ip + 1
+
+def op_fused(st, ip, first, args1, second, args2):
+    first(st, ip, *args1)
+    return second(st, ip, *args2)
+
+def op_pushs_pops(st, ip, src, dst):
+    sym = symbol(src, st)
+    var = getvar(dst, st)
+    var.type = sym.type
+    var.value = share(sym.value)
+    return ip + 1
+
+def op_sequence(st, ip, *steps):
+    for handler, args in steps:
+        handler(st, ip, *args)
+    return ip + 1
+
+def op_checkpoint(st, ip, order, handler, args):
+    nxt = handler(st, ip, *args)
+    limits = st.limits
+    limits.count += ip - limits.last + 1
+    limits.last = nxt
+    limits.countdown -= 1
+    if not limits.countdown:
+        limits.check(st, order)
+    return nxt
+
+def op_count(st, ip, order, handler, args):
+    nxt = handler(st, ip, *args)
+    limits = st.limits
+    limits.count += ip - limits.last + 1
+    limits.last = nxt
+    return nxt
+
+def op_grow(st, ip, order, handler, args):
+    nxt = handler(st, ip, *args)
+    st.limits.grow(getvar(args[0], st).value, order)
+    return nxt
+
+def fetch(arg, g):
+    if arg.type == "var":
+        return g[arg.name].value
+    return arg.value
+
+def op_move_fast(st, ip, dst, src):
+    g = st.globals
+    var = g[dst.name]
+    sym = g[src.name] if src.type == "var" else src
+    var.value = share(sym.value)
+    var.type = sym.type
+    return ip + 1
+
+def op_add_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) + fetch(src2, g)
+    var.type = "int"
+    return ip + 1
+
+def op_sub_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) - fetch(src2, g)
+    var.type = "int"
+    return ip + 1
+
+def op_mul_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) * fetch(src2, g)
+    var.type = "int"
+    return ip + 1
+
+def op_idiv_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = divide(fetch(src1, g), fetch(src2, g))
+    var.type = "int"
+    return ip + 1
+
+def op_lt_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) < fetch(src2, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_gt_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) > fetch(src2, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_eq_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) == fetch(src2, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_and_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) and fetch(src2, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_or_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = fetch(src1, g) or fetch(src2, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_not_fast(st, ip, dst, src):
+    g = st.globals
+    var = g[dst.name]
+    var.value = not fetch(src, g)
+    var.type = "bool"
+    return ip + 1
+
+def op_concat_fast(st, ip, dst, src1, src2):
+    g = st.globals
+    var = g[dst.name]
+    var.value = concat(fetch(src1, g), fetch(src2, g))
+    var.type = "string"
+    return ip + 1
+
+def op_strlen_fast(st, ip, dst, src):
+    g = st.globals
+    var = g[dst.name]
+    var.value = len(fetch(src, g))
+    var.type = "int"
+    return ip + 1
+
+def op_jumpifeq_fast(st, ip, target, src1, src2):
+    g = st.globals
+    if fetch(src1, g) == fetch(src2, g):
+        return target
+    return ip + 1
+
+def op_jumpifneq_fast(st, ip, target, src1, src2):
+    g = st.globals
+    if fetch(src1, g) != fetch(src2, g):
+        return target
+    return ip + 1
+
+OPCODES = {
+    "MOVE": (op_move, 2),
+    "CREATEFRAME": (op_createframe, 0),
+    "PUSHFRAME": (op_pushframe, 0),
+    "POPFRAME": (op_popframe, 0),
+    "DEFVAR": (op_defvar, 1),
+    "CALL": (op_call, 1),
+    "RETURN": (op_return, 0),
+    "PUSHS": (op_pushs, 1),
+    "POPS": (op_pops, 1),
+    "ADD": (op_add, 3),
+    "SUB": (op_sub, 3),
+    "MUL": (op_mul, 3),
+    "IDIV": (op_idiv, 3),
+    "LT": (op_lt, 3),
+    "GT": (op_gt, 3),
+    "EQ": (op_eq, 3),
+    "AND": (op_and, 3),
+    "OR": (op_or, 3),
+    "NOT": (op_not, 2),
+    "INT2CHAR": (op_int2char, 2),
+    "STRI2INT": (op_stri2int, 3),
+    "READ": (op_read, 2),
+    "WRITE": (op_write, 1),
+    "CONCAT": (op_concat, 3),
+    "STRLEN": (op_strlen, 2),
+    "GETCHAR": (op_getchar, 3),
+    "SETCHAR": (op_setchar, 3),
+    "TYPE": (op_type, 2),
+    "LABEL": (op_label, 1),
+    "JUMP": (op_jump, 1),
+    "JUMPIFEQ": (op_jumpifeq, 3),
+    "JUMPIFNEQ": (op_jumpifneq, 3),
+    "EXIT": (op_exit, 1),
+    "DPRINT": (op_dprint, 1),
+    "BREAK": (op_break, 0),
+    "ADDS": (op_adds, 0),
+    "SUBS": (op_subs, 0),
+    "MULS": (op_muls, 0),
+    "IDIVS": (op_idivs, 0),
+    "LTS": (op_lts, 0),
+    "GTS": (op_gts, 0),
+    "EQS": (op_eqs, 0),
+    "ANDS": (op_ands, 0),
+    "ORS": (op_ors, 0),
+    "NOTS": (op_nots, 0),
+    "INT2CHARS": (op_int2chars, 0),
+    "STRI2INTS": (op_stri2ints, 0),
+    "CLEARS": (op_clears, 0),
+    "JUMPIFEQS": (op_jumpifeqs, 1),
+    "JUMPIFNEQS": (op_jumpifneqs, 1),
+}
+
+BRANCHES = ("CALL", "JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS")
+
+OPNAMES = list(OPCODES)
+OPCODE_IDS = {name: ident for ident, name in enumerate(OPNAMES)}
+UNKNOWN_OPCODE = 255
+
+HANDLERS = {name: handler for name, (handler, count) in OPCODES.items()}
+HANDLERS["UNDEFINED"] = op_undefined
+NAMES = {handler: name for name, handler in HANDLERS.items()}
+
+CACHE_VERSION = 1
+
+WRITERS = {HANDLERS[name] for name in (
+    "MOVE", "POPS", "ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR", "NOT",
+    "INT2CHAR", "STRI2INT", "READ", "CONCAT", "STRLEN", "GETCHAR", "SETCHAR", "TYPE",
+)}
+
+def peek(ref, st):
+    if ref.frame == "GF":
+        frame = st.stack.globals
+    elif ref.frame == "LF":
+        frame = st.stack.local
+    else:
+        frame = st.stack.temporary
+    if frame is None:
+        return None
+    return frame.vars.get(ref.name)
+
+class Stats:
+    def __init__(self, path=None, hot=10):
+        self.path = path
+        self.hot = hot
+        self.start()
+
+    def start(self):
+        self.code = []
+        self.counts = []
+        self.vars = 0
+        self.maxvars = 0
+        self.maxstack = 0
+        self.maxcalls = 0
+
+    def execute(self, st, code):
+        self.code = code
+        counts = self.counts = [0] * len(code)
+        ip = 0
+        end = len(code)
+        while ip < end:
+            handler, args = code[ip]
+            counts[ip] += 1
+            var = None
+            inner, params = (args[1], args[2]) if handler in GUARDS else (handler, args)
+            if inner in WRITERS:
+                var = peek(params[0], st)
+                if var is not None and var.type is not None:
+                    var = None
+            elif inner is op_createframe or inner is op_popframe:
+                self.drop(st.stack.temporary)
+            ip = handler(st, ip, *args)
+            if var is not None and var.type is not None:
+                self.vars += 1
+                if self.vars > self.maxvars:
+                    self.maxvars = self.vars
+            if len(st.datastack.types) > self.maxstack:
+                self.maxstack = len(st.datastack.types)
+            if len(st.calls) > self.maxcalls:
+                self.maxcalls = len(st.calls)
+
+    def drop(self, frame):
+        if frame is None:
+            return
+        for var in frame.vars.values():
+            if var.type is not None:
+                self.vars -= 1
+
+    def report(self):
+        opcodes = {}
+        for (handler, args), count in zip(self.code, self.counts):
+            if count:
+                name = opname(handler, args)
+                opcodes[name] = opcodes.get(name, 0) + count
+        executed = [(count, ip) for ip, count in enumerate(self.counts) if count]
+        executed.sort(key=lambda item: (-item[0], item[1]))
+        return {
+            "instructions": sum(self.counts),
+            "opcodes": opcodes,
+            "orders": {str(ip + 1): count for ip, count in enumerate(self.counts) if count},
+            "hot": [
+                {"order": ip + 1, "opcode": opname(*self.code[ip]), "count": count}
+                for count, ip in executed[:self.hot]
+            ],
+            "vars": self.maxvars,
+            "stack": self.maxstack,
+            "calls": self.maxcalls,
+        }
+
+    def write(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "w") as file:
+                json.dump(self.report(), file, indent=2)
+        except OSError:
+            exit(12, "Stats file can't be opened")
+
+PROFILE_DEPTH = 128
+
+class Call:
+    __slots__ = ("name", "depth", "children", "count", "time")
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.children = {}
+        self.count = 0
+        self.time = 0.0
+
+class Profile:
+    def __init__(self, collapsed=None, speedscope=None):
+        self.collapsed = collapsed
+        self.speedscope = speedscope
+        self.start()
+
+    def start(self):
+        self.root = Call("main", 0)
+        self.code = []
+
+    def function(self, target):
+        if 0 < target <= len(self.code) and self.code[target - 1][0] is op_label:
+            return self.code[target - 1][1][0].value
+        return f"order {target + 1}"
+
+    def execute(self, st, code):
+        self.code = code
+        names = {}
+        callers = []
+        node = self.root
+        count = 0
+        ip = 0
+        end = len(code)
+        last = time.perf_counter()
+        try:
+            while ip < end:
+                handler, args = code[ip]
+                count += 1
+                inner, params = (args[1], args[2]) if handler in GUARDS else (handler, args)
+                if inner is op_call:
+                    ip = handler(st, ip, *args)
+                    now = time.perf_counter()
+                    node.count += count
+                    node.time += now - last
+                    count, last = 0, now
+                    name = names.get(params[0])
+                    if name is None:
+                        name = names[params[0]] = self.function(params[0])
+                    callers.append(node)
+                    if name != node.name and node.depth < PROFILE_DEPTH:
+                        child = node.children.get(name)
+                        if child is None:
+                            child = node.children[name] = Call(name, node.depth + 1)
+                        node = child
+                elif inner is op_return:
+                    ip = handler(st, ip, *args)
+                    now = time.perf_counter()
+                    node.count += count
+                    node.time += now - last
+                    count, last = 0, now
+                    node = callers.pop()
+                else:
+                    ip = handler(st, ip, *args)
+        finally:
+            node.count += count
+            node.time += time.perf_counter() - last
+
+    def nodes(self):
+        pending = [(self.root, 0)]
+        while pending:
+            node, depth = pending.pop()
+            yield node, depth
+            pending.extend((child, depth + 1) for child in reversed(list(node.children.values())))
+
+    def paths(self):
+        path = []
+        for node, depth in self.nodes():
+            del path[depth:]
+            path.append(node.name)
+            yield node, path
+
+    def functions(self):
+        totals = {}
+        for node, depth in reversed(list(self.nodes())):
+            count, elapsed = node.count, node.time
+            for child in node.children.values():
+                count += totals[child][0]
+                elapsed += totals[child][1]
+            totals[node] = (count, elapsed)
+        table = {}
+        active = {}
+        path = []
+        for node, depth in self.nodes():
+            for name in path[depth:]:
+                active[name] -= 1
+            del path[depth:]
+            row = table.setdefault(node.name, [0, 0, 0.0, 0.0])
+            row[1] += node.count
+            row[3] += node.time
+            if not active.get(node.name):
+                row[0] += totals[node][0]
+                row[2] += totals[node][1]
+            path.append(node.name)
+            active[node.name] = active.get(node.name, 0) + 1
+        return table
+
+    def report(self, err):
+        table = sorted(self.functions().items(), key=lambda item: (-item[1][0], item[0]))
+        lines = [f"{'function':<24}{'inclusive':>12}{'exclusive':>12}{'incl ms':>10}{'excl ms':>10}"]
+        for name, (inclusive, exclusive, elapsed, own) in table:
+            lines.append(f"{name:<24}{inclusive:>12}{exclusive:>12}{elapsed * 1000:>10.1f}{own * 1000:>10.1f}")
+        print("\n".join(lines), file=err)
+
+    def write(self, st):
+        try:
+            if self.collapsed is not None:
+                with open(self.collapsed, "w") as file:
+                    for node, path in self.paths():
+                        if node.count:
+                            file.write(f"{';'.join(path)} {node.count}\n")
+            if self.speedscope is not None:
+                with open(self.speedscope, "w") as file:
+                    json.dump(self.export(), file)
+        except OSError:
+            exit(12, "Profile file can't be opened")
+        self.report(st.err)
+
+    def export(self):
+        frames = {}
+        samples = []
+        counts = []
+        times = []
+        for node, path in self.paths():
+            if node.count:
+                samples.append([frames.setdefault(name, len(frames)) for name in path])
+                counts.append(node.count)
+                times.append(node.time)
+        profile = lambda name, unit, weights: {
+            "type": "sampled",
+            "name": name,
+            "unit": unit,
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [profile("instructions", "none", counts), profile("time", "seconds", times)],
+            "name": "IPPcode profile",
+            "activeProfileIndex": 0,
+            "exporter": "interpret.py",
+        }
+
+TRACE_ITEMS = 16
+SPECIAL = re.compile(r"[\x00-\x20#\\]")
+
+def describe(typ, value, width=64):
+    if typ is None:
+        return "(unset)"
+    elif typ == "nil":
+        return "nil@nil"
+    elif typ == "bool":
+        return "bool@true" if value else "bool@false"
+    elif typ == "string":
+        text = str(value)
+        if len(text) > width:
+            text = text[:width] + "..."
+        return "string@" + SPECIAL.sub(lambda char: "\\%03d" % ord(char.group()), text)
+    return f"{typ}@{value}"
+
+def snapshot(ref, st):
+    if ref.frame == "GF":
+        var = st.globals.get(ref.name)
+    else:
+        var = peek(ref, st)
+    if var is None:
+        return None
+    if type(var.value) is Chars:
+        return var.type, str(var.value)
+    return var.type, var.value
+
+class Trace:
+    def __init__(self, size, orders=None):
+        self.size = size
+        self.orders = orders
+        self.start()
+
+    def start(self):
+        self.ips = [None] * self.size
+        self.values = [None] * self.size
+        self.slot = -1
+        self.code = []
+        self.refs = []
+
+    def order(self, ip):
+        return ip + 1 if self.orders is None else self.orders[ip]
+
+    def execute(self, st, code):
+        self.code = code
+        refs = self.refs = [
+            tuple(arg for arg in operands(handler, args) if isinstance(arg, Reference))
+            for handler, args in code
+        ]
+        ips, values, size = self.ips, self.values, self.size
+        slot = -1
+        ip = 0
+        end = len(code)
+        try:
+            while ip < end:
+                slot += 1
+                if slot == size:
+                    slot = 0
+                ips[slot] = ip
+                current = refs[ip]
+                values[slot] = [snapshot(ref, st) for ref in current] if current else current
+                handler, args = code[ip]
+                ip = handler(st, ip, *args)
+        finally:
+            self.slot = slot
+
+    def operand(self, handler, arg, resolved):
+        if isinstance(arg, Reference):
+            name = f"{arg.frame}@{arg.name}"
+            value = next(resolved)
             if value is None:
-                exit(56, "WRITE Missing value")
-            elif typ == "nil":
-                print("", end='')
-            elif typ == "bool":
-                print(str(value).lower(), end='')
-            elif typ == "string":
-                print(value, end='')
+                return name + "=(undefined)"
+            return name + "=" + describe(*value)
+        elif isinstance(arg, Symbol):
+            if arg.type in ("label", "type"):
+                return f"{arg.type}@{arg.value}"
+            return describe(arg.type, arg.value)
+        elif type(arg) is int:
+            return f"-> order {self.order(arg)}" if arg < len(self.code) else "-> end"
+        return str(arg)
+
+    def entries(self):
+        for slot in list(range(self.slot + 1, self.size)) + list(range(self.slot + 1)):
+            ip = self.ips[slot]
+            if ip is None:
+                continue
+            handler, args = self.code[ip]
+            resolved = iter(self.values[slot])
+            text = " ".join(self.operand(handler, arg, resolved) for arg in operands(handler, args))
+            yield f"  order {self.order(ip)}: {opname(handler, args)} {text}".rstrip()
+
+    def frame(self, name, frame):
+        if frame is None:
+            return f"  {name}: (none)"
+        variables = ", ".join(f"{var.name}={describe(var.type, var.value)}" for var in frame.vars.values())
+        return f"  {name}: {variables or '(empty)'}"
+
+    def dump(self, st):
+        lines = [f"Last {self.size} instructions:"]
+        lines.extend(self.entries())
+        lines.append("Frames:")
+        lines.append(self.frame("GF", st.stack.globals))
+        frames = st.stack.frames
+        for depth in range(len(frames) - 1, max(len(frames) - TRACE_ITEMS, 0) - 1, -1):
+            name = "LF" if depth == len(frames) - 1 else f"LF[{depth}]"
+            lines.append(self.frame(name, frames[depth]))
+        if len(frames) > TRACE_ITEMS:
+            lines.append(f"  ... {len(frames) - TRACE_ITEMS} more local frames")
+        lines.append(self.frame("TF", st.stack.temporary))
+        types, values = st.datastack.types, st.datastack.values
+        stack = " ".join(describe(types[i], values[i]) for i in range(len(types) - 1, max(len(types) - TRACE_ITEMS, 0) - 1, -1))
+        if len(types) > TRACE_ITEMS:
+            stack += f" ... {len(types) - TRACE_ITEMS} more"
+        lines.append("Data stack (top first): " + (stack or "(empty)"))
+        print("\n".join(lines), file=st.err)
+
+STRING_BYTES = sys.getsizeof("")
+VARIABLE_BYTES = sys.getsizeof(Variable("")) + 3 * sys.getsizeof(0)
+FRAME_BYTES = sys.getsizeof(Frame()) + sys.getsizeof({})
+SLOT_BYTES = 8
+
+def footprint(value):
+    if type(value) is str:
+        return sys.getsizeof(value)
+    elif type(value) is Chars:
+        return sys.getsizeof(value.chars)
+    return STRING_BYTES + len(value)
+
+class Memory:
+    def __init__(self, path=None):
+        self.path = path
+        self.start()
+
+    def start(self):
+        self.peak = {"vars": 0, "strings": 0, "frames": 0, "calls": 0, "stack": 0, "bytes": 0}
+
+    def measure(self, st):
+        stack = st.stack
+        counts = {}
+        strings = 0
+        for kind, frames in (("GF", [stack.globals]), ("LF", stack.frames), ("TF", [stack.temporary])):
+            count = 0
+            for frame in frames:
+                if frame is None:
+                    continue
+                count += len(frame.vars)
+                for var in frame.vars.values():
+                    if var.type == "string":
+                        strings += footprint(var.value)
+            counts[kind] = count
+        for typ, value in zip(st.datastack.types, st.datastack.values):
+            if typ == "string":
+                strings += footprint(value)
+        frames = len(stack.frames) + 1 + (stack.temporary is not None)
+        slots = 2 * len(st.datastack.types) + len(st.calls)
+        return {
+            "vars": counts,
+            "strings": strings,
+            "frames": len(stack.frames),
+            "calls": len(st.calls),
+            "stack": len(st.datastack.types),
+            "bytes": sum(counts.values()) * VARIABLE_BYTES + frames * FRAME_BYTES + slots * SLOT_BYTES + strings,
+        }
+
+    def sample(self, st):
+        usage = self.measure(st)
+        peak = self.peak
+        peak["vars"] = max(peak["vars"], sum(usage["vars"].values()))
+        for key in ("strings", "frames", "calls", "stack", "bytes"):
+            peak[key] = max(peak[key], usage[key])
+        peak["frames"] = max(peak["frames"], st.stack.peak)
+        return usage
+
+    def report(self, st):
+        usage = self.sample(st)
+        return {
+            "exit": usage,
+            "peak": self.peak,
+            "pushframes": st.stack.pushes,
+            "popframes": st.stack.pops,
+            "leaked": max(len(st.stack.frames) - len(st.calls), 0),
+        }
+
+    def write(self, st):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "w") as file:
+                json.dump(self.report(st), file, indent=2)
+        except OSError:
+            exit(12, "Memory report file can't be opened")
+
+class Limits:
+    def __init__(self, instructions=None, seconds=None, depth=None, stack=None, strings=None, memory=None, interval=256):
+        self.instructions = instructions
+        self.seconds = seconds
+        self.depth = depth
+        self.stack = stack
+        self.strings = strings
+        self.memory = memory
+        self.usage = None if memory is None else Memory()
+        self.interval = interval
+        self.start()
+
+    def start(self):
+        self.count = 0
+        self.last = 0
+        self.countdown = self.interval
+        self.deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+        if self.usage is not None:
+            self.usage.start()
+
+    def check(self, st, order):
+        self.countdown = self.interval
+        if self.instructions is not None and self.count > self.instructions:
+            exit(60, f"Instruction limit exceeded at order {order}")
+        if self.depth is not None and len(st.calls) > self.depth:
+            exit(62, f"Call depth limit exceeded at order {order}")
+        if self.stack is not None and len(st.datastack.types) > self.stack:
+            exit(63, f"Data stack limit exceeded at order {order}")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            exit(61, f"Time limit exceeded at order {order}")
+        if self.strings is not None and self.size(st) > self.strings:
+            exit(64, f"String size limit exceeded at order {order}")
+        if self.usage is not None:
+            usage = self.usage.sample(st)
+            if self.memory is not None and usage["bytes"] > self.memory:
+                exit(65, f"Memory limit exceeded at order {order}")
+
+    def grow(self, value, order):
+        if self.strings is not None and len(value) > self.strings:
+            exit(64, f"String size limit exceeded at order {order}")
+        if self.memory is not None and footprint(value) > self.memory:
+            exit(65, f"Memory limit exceeded at order {order}")
+
+    def size(self, st):
+        frames = [st.stack.globals] + st.stack.frames
+        if st.stack.temporary is not None:
+            frames.append(st.stack.temporary)
+        total = 0
+        for frame in frames:
+            for var in frame.vars.values():
+                if var.type == "string":
+                    total += len(var.value)
+        for typ, value in zip(st.datastack.types, st.datastack.values):
+            if typ == "string":
+                total += len(value)
+        return total
+
+def operand(type, value):
+    if type == "var":
+        frame, name = value.split("@", 1)
+        return Reference(frame, name)
+    elif type == "int":
+        return Symbol("int", int(value))
+    elif type == "bool":
+        return Symbol("bool", value.lower() == "true")
+    elif type == "nil":
+        return Symbol("nil", None)
+    elif type == "type":
+        return Symbol("type", value.lower())
+    return Symbol(type, value)
+
+def decode(program):
+    for i, opcode in enumerate(program.opcodes):
+        if opcode == UNKNOWN_OPCODE:
+            exit(32, "Invalid instruction")
+        arg_count(program.operands(i), OPCODES[OPNAMES[opcode]][1])
+    labels = LabelList()
+    labels.load_labels(program)
+    operands = [operand(type, value) for type, value in program.pool]
+    code = []
+    for i, opcode in enumerate(program.opcodes):
+        name = OPNAMES[opcode]
+        handler = OPCODES[name][0]
+        args = tuple(operands[slot] for slot in program.operands(i))
+        if name == "BREAK":
+            args = (program.orders[i],)
+        elif name in BRANCHES:
+            label = labels.labels.get(args[0].value)
+            if label is None:
+                handler, args = op_undefined, ()
             else:
-                value = str(value)
-                print(value, end='')
-        elif instr.type == "CONCAT":
-            arg_count(instr.args, 3)
-            type_check(gettype(instr.args[1], frame, stack), gettype(instr.args[2], frame, stack), ["string"])
-            value1 = getvalue(instr.args[1], frame, stack)
-            value2 = getvalue(instr.args[2], frame, stack)
-            var = getvar(instr.args[0], frame, stack)
-            var.value = value1 + value2
-            var.type = "string"
-            updatevar(var, frame, stack)
-        elif instr.type == "STRLEN":
-            arg_count(instr.args, 2)
-            if gettype(instr.args[1], frame, stack) != "string":
-                exit(53, "Invalid data type")
-            var = getvar(instr.args[0], frame, stack)
-            value = getvalue(instr.args[1], frame, stack)
-            var.value = len(value)
-            var.type = "int"
-            updatevar(var)
-        elif instr.type == "GETCHAR":
-            arg_count(instr.args, 3)
-            var = getvar(instr.args[0], frame, stack)
-            type1 = gettype(instr.args[1], frame, stack)
-            type2 = gettype(instr.args[2], frame, stack)
-            index = getvalue(instr.args[2], frame, stack)
-            value = getvalue(instr.args[1], frame, stack)
-            if type1 != "int" or type2 != "string":
-                exit(53, "Invalid data type")
-            if len(value) <= index:
-                exit(58, "GETCHAR index out of range")
-            var.value = value[index]
-            var.type = "string"
-            updatevar(var, frame, stack)
-        elif instr.type == "SETCHAR":
-            arg_count(instr.args, 3)
-            var = getvar(instr.args[0], frame, stack)
-            type1 = gettype(instr.args[1], frame, stack)
-            type2 = gettype(instr.args[2], frame, stack)
-            index = getvalue(instr.args[1], frame, stack)
-            value = getvalue(instr.args[2], frame, stack)
-            if type1 != "int" or type2 != "string" or var.type != "string":
-                exit(53, "Invalid data type")
-            if len(value) <= index:
-                exit(58, "SETCHAR index out of range")
-            value[index] = var
-            var.value = value
-            updatevar(var, frame, stack)
-        elif instr.type == "TYPE":
-            arg_count(instr.args, 2)
-            var = getvar(instr.args[0], frame, stack)
-            typ = gettype(instr.args[1], frame, stack)
-            if typ is None:
-                typ = ""
-            var.value = typ
-            var.type = "string"
-        elif instr.type == "LABEL":
-            pass
-        elif instr.type == "JUMP":
-            arg_count(instr.args, 1)
-            label = labels.get_label(instr.args[0].value)
-            iter = label.order - 1
-        elif \
-        instr.type == "JUMPIFEQ" or \
-        instr.type == "JUMPIFNEQ":
-            arg_count(instr.args, 3)
-            label = labels.get_label(instr.args[0].value)
-            type1 = gettype(instr.args[1], frame, stack)
-            type2 = gettype(instr.args[2], frame, stack)
-            value1 = getvalue(instr.args[1], frame, stack)
-            value2 = getvalue(instr.args[2], frame, stack)
-            type_check(type1, type2, [])
-            if instr.type == "JUMPIFEQ":
-                if str(value1) == str(value2):
-                    iter = label.order - 1
-            elif instr.type == "JUMPIFNEQ":
-                if str(value1) != str(value2):
-                    iter = label.order - 1
-        elif instr.type == "EXIT":
-            arg_count(instr.args, 1)
-            if gettype(instr.args[0], frame, stack) != "int":
-                exit(53, "Invalid data type")
-            value = getvalue(instr.args[0], frame, stack)
-            if int(value) >= 0 and int(value) <= 49:
-                sys.exit(int(value))
+                args = (label.order,) + args[1:]
+        code.append((handler, args))
+    return code
+
+ABSENT = "absent"
+UNSET = "unset"
+ANY = frozenset(("int", "bool", "string", "nil"))
+UNKNOWN = ANY | {ABSENT, UNSET}
+
+RESULTS = {
+    op_pops: ANY,
+    op_add: frozenset(("int",)),
+    op_sub: frozenset(("int",)),
+    op_mul: frozenset(("int",)),
+    op_idiv: frozenset(("int",)),
+    op_lt: frozenset(("bool",)),
+    op_gt: frozenset(("bool",)),
+    op_eq: frozenset(("bool",)),
+    op_and: frozenset(("bool",)),
+    op_or: frozenset(("bool",)),
+    op_not: frozenset(("bool",)),
+    op_int2char: frozenset(("string",)),
+    op_stri2int: frozenset(("int",)),
+    op_concat: frozenset(("string",)),
+    op_strlen: frozenset(("int",)),
+    op_getchar: frozenset(("string",)),
+    op_setchar: frozenset(("string",)),
+    op_type: frozenset(("string",)),
+}
+
+FAST = {
+    op_add: (op_add_fast, ("int",)),
+    op_sub: (op_sub_fast, ("int",)),
+    op_mul: (op_mul_fast, ("int",)),
+    op_idiv: (op_idiv_fast, ("int",)),
+    op_lt: (op_lt_fast, ("int", "bool", "string")),
+    op_gt: (op_gt_fast, ("int", "bool", "string")),
+    op_eq: (op_eq_fast, ("int", "bool", "string")),
+    op_and: (op_and_fast, ("bool",)),
+    op_or: (op_or_fast, ("bool",)),
+    op_not: (op_not_fast, ("bool",)),
+    op_concat: (op_concat_fast, ("string",)),
+    op_strlen: (op_strlen_fast, ("string",)),
+    op_jumpifeq: (op_jumpifeq_fast, tuple(ANY)),
+    op_jumpifneq: (op_jumpifneq_fast, tuple(ANY)),
+    op_move: (op_move_fast, None),
+}
+
+GUARDS = (op_checkpoint, op_count, op_grow)
+
+def opname(handler, args):
+    if handler in GUARDS:
+        return opname(args[1], args[2])
+    elif handler is op_fused:
+        return opname(args[0], args[1]) + "+" + opname(args[2], args[3])
+    elif handler is op_sequence:
+        return "+".join(opname(step, params) for step, params in args)
+    elif handler is op_pushs_pops:
+        return "PUSHS+POPS"
+    return NAMES[handler]
+
+def operands(handler, args):
+    if handler in GUARDS:
+        return operands(args[1], args[2])
+    elif handler is op_fused:
+        return operands(args[0], args[1]) + operands(args[2], args[3])
+    elif handler is op_sequence:
+        return tuple(arg for step, params in args for arg in operands(step, params))
+    elif handler is op_break:
+        return ()
+    return args
+
+for handler, (fast, types) in FAST.items():
+    NAMES[fast] = NAMES[handler]
+    if handler in WRITERS:
+        WRITERS.add(fast)
+
+def typeset(arg, state):
+    if isinstance(arg, Symbol):
+        return frozenset((arg.type,))
+    elif arg.frame == "GF":
+        return state.get(arg.name, frozenset((ABSENT,)))
+    return UNKNOWN
+
+def successors(code, ip, returns):
+    handler, args = code[ip]
+    if handler is op_jump or handler is op_call:
+        return (args[0],)
+    elif handler is op_return:
+        return returns
+    elif handler is op_exit or handler is op_undefined:
+        return ()
+    elif handler in (op_jumpifeq, op_jumpifneq, op_jumpifeqs, op_jumpifneqs):
+        return (ip + 1, args[0])
+    return (ip + 1,)
+
+def blocks(code):
+    end = len(code)
+    points = {0}
+    for ip, (handler, args) in enumerate(code):
+        if handler in JUMPS:
+            points.add(args[0])
+        if handler in JUMPS or handler in (op_return, op_exit, op_undefined):
+            points.add(ip + 1)
+    points = sorted(point for point in points if point < end)
+    return dict(zip(points, points[1:] + [end]))
+
+def solve(code, returns, transfer, combine, follow=None):
+    end = len(code)
+    bounds = blocks(code)
+    states = {0: {}} if end else {}
+    work = [0] if end else []
+    while work:
+        start = work.pop()
+        state = dict(states[start])
+        last = bounds[start] - 1
+        for ip in range(start, last):
+            transfer(*code[ip], state)
+        if follow is None:
+            following = successors(code, last, returns)
+        else:
+            following = follow(code, last, returns, state)
+        transfer(*code[last], state)
+        for nxt in following:
+            if nxt >= end:
+                continue
+            old = states.get(nxt)
+            if old is None:
+                states[nxt] = state
             else:
-                exit(57, "EXIT incorrect exit code")
-        elif instr.type == "DPRINT":
-            arg_count(instr.args, 1)
-            print(getvalue(instr.args[0], frame, stack), file=sys.stderr)
-        elif instr.type == "BREAK":
-            arg_count(instr.args, 0)
-            print(f"Current instruction: {instr.order}", file=sys.stderr)
+                merged = combine(old, state)
+                if merged == old:
+                    continue
+                states[nxt] = merged
+            work.append(nxt)
+    return bounds, states
+
+def transfer(handler, args, state):
+    if not args or not isinstance(args[0], Reference) or args[0].frame != "GF":
+        return
+    if handler is op_defvar:
+        state[args[0].name] = frozenset((UNSET,))
+    elif handler is op_move:
+        state[args[0].name] = typeset(args[1], state) & ANY
+    elif handler is op_read:
+        state[args[0].name] = frozenset((args[1].value, "nil"))
+    elif handler in RESULTS:
+        state[args[0].name] = RESULTS[handler]
+
+def join(old, new):
+    absent = frozenset((ABSENT,))
+    return {name: old.get(name, absent) | new.get(name, absent) for name in old.keys() | new.keys()}
+
+def specialize(handler, args, state):
+    fast, types = FAST[handler]
+    if handler in WRITERS:
+        dst = args[0]
+        if dst.frame != "GF" or ABSENT in state.get(dst.name, frozenset((ABSENT,))):
+            return None
+    known = []
+    for arg in args[1:]:
+        if isinstance(arg, Reference) and arg.frame != "GF":
+            return None
+        known.append(typeset(arg, state))
+    if types is None:
+        if known[0] and known[0] <= ANY:
+            return fast
+        return None
+    if len(known[0]) != 1 or any(kind != known[0] for kind in known):
+        return None
+    if next(iter(known[0])) not in types:
+        return None
+    return fast
+
+def infer(code):
+    end = len(code)
+    returns = tuple(ip + 1 for ip, (handler, args) in enumerate(code) if handler is op_call and ip + 1 < end)
+    bounds, states = solve(code, returns, transfer, join)
+
+    specialized = list(code)
+    for start, state in states.items():
+        state = dict(state)
+        for ip in range(start, bounds[start]):
+            handler, args = code[ip]
+            if handler in FAST:
+                fast = specialize(handler, args, state)
+                if fast is not None:
+                    specialized[ip] = (fast, args)
+            transfer(handler, args, state)
+    return specialized
+
+JUMPS = (
+    op_call, op_jump, op_jumpifeq, op_jumpifneq, op_jumpifeqs, op_jumpifneqs,
+    op_jumpifeq_fast, op_jumpifneq_fast,
+)
+
+STEPS = (op_add, op_sub, op_add_fast, op_sub_fast)
+TESTS = (op_jumpifeq, op_jumpifneq, op_jumpifeq_fast, op_jumpifneq_fast)
+MOVES = (op_move, op_move_fast)
+
+def fusable(first, second):
+    if first is op_pushs and second is op_pops:
+        return True
+    return first in STEPS and second in TESTS
+
+def optimize(code, orders=None):
+    targets = set()
+    for ip, (handler, args) in enumerate(code):
+        if handler in JUMPS:
+            targets.add(args[0])
+        if handler is op_call:
+            targets.add(ip + 1)
+
+    groups = []
+    ip = 0
+    end = len(code)
+    while ip < end:
+        handler = code[ip][0]
+        size = 1
+        if handler is op_label:
+            size = 0
+        elif handler in MOVES:
+            while ip + size < end and ip + size not in targets and code[ip + size][0] in MOVES:
+                size += 1
+        elif ip + 1 < end and ip + 1 not in targets and fusable(handler, code[ip + 1][0]):
+            size = 2
+        if size:
+            groups.append((ip, size))
+        ip += max(size, 1)
+
+    position = [len(groups)] * (end + 1)
+    starts = {start: index for index, (start, size) in enumerate(groups)}
+    for ip in reversed(range(end)):
+        position[ip] = starts.get(ip, position[ip + 1])
+
+    if orders is not None:
+        orders.extend(start + size for start, size in groups)
+
+    optimized = []
+    for start, size in groups:
+        part = []
+        for handler, args in code[start:start + size]:
+            if handler in JUMPS:
+                args = (position[args[0]],) + args[1:]
+            part.append((handler, args))
+        if size == 1:
+            optimized.append(part[0])
+        elif part[0][0] in MOVES:
+            optimized.append((op_sequence, tuple(part)))
+        elif part[0][0] is op_pushs:
+            optimized.append((op_pushs_pops, part[0][1] + part[1][1]))
         else:
-            exit(32, "Invalid instruction")
-        if len(instructions) < (iter + 2):
+            (first, args1), (second, args2) = part
+            optimized.append((op_fused, (first, args1, second, args2)))
+    return optimized
+
+VARYING = "varying"
+
+ARITHMETIC = {op_add: operator.add, op_sub: operator.sub, op_mul: operator.mul}
+COMPARISONS = {op_lt: operator.lt, op_gt: operator.gt, op_eq: operator.eq}
+READERS = (op_write, op_pushs, op_exit, op_dprint)
+
+def constant(arg, state):
+    if isinstance(arg, Symbol):
+        return arg
+    if arg.frame == "GF":
+        value = state.get(arg.name)
+        if isinstance(value, Symbol):
+            return value
+    return None
+
+def same(old, new):
+    if isinstance(old, Symbol) and isinstance(new, Symbol):
+        return old.type == new.type and old.value == new.value
+    return old == new
+
+def merge(old, new):
+    merged = {}
+    for name in old.keys() | new.keys():
+        value = old.get(name, ABSENT)
+        merged[name] = value if same(value, new.get(name, ABSENT)) else VARYING
+    return merged
+
+def evaluate(handler, args):
+    types = tuple(arg.type for arg in args)
+    values = tuple(arg.value for arg in args)
+    if handler is op_move:
+        return args[0]
+    elif handler in ARITHMETIC and types == ("int", "int"):
+        return Symbol("int", ARITHMETIC[handler](*values))
+    elif handler is op_idiv and types == ("int", "int") and values[1] != 0:
+        return Symbol("int", divide(*values))
+    elif handler in COMPARISONS and types[0] == types[1] and types[0] in ("int", "bool", "string"):
+        return Symbol("bool", COMPARISONS[handler](*values))
+    elif handler is op_and and types == ("bool", "bool"):
+        return Symbol("bool", values[0] and values[1])
+    elif handler is op_or and types == ("bool", "bool"):
+        return Symbol("bool", values[0] or values[1])
+    elif handler is op_not and types == ("bool",):
+        return Symbol("bool", not values[0])
+    elif handler is op_concat and types == ("string", "string"):
+        return Symbol("string", values[0] + values[1])
+    elif handler is op_strlen and types == ("string",):
+        return Symbol("int", len(values[0]))
+    elif handler is op_int2char and types == ("int",) and 0 <= values[0] <= sys.maxunicode:
+        return Symbol("string", chr(values[0]))
+    elif handler in (op_stri2int, op_getchar) and types == ("string", "int") and 0 <= values[1] < len(values[0]):
+        char = values[0][values[1]]
+        return Symbol("string", char) if handler is op_getchar else Symbol("int", ord(char))
+    elif handler is op_setchar and types == ("string", "int", "string"):
+        text, index, char = values
+        if 0 <= index < len(text) and char:
+            return Symbol("string", text[:index] + char[0] + text[index + 1:])
+    elif handler is op_type and len(args) == 1:
+        return Symbol("string", types[0])
+    return None
+
+def simplify(handler, args, state):
+    if handler is op_jumpifeq or handler is op_jumpifneq:
+        const1, const2 = constant(args[1], state), constant(args[2], state)
+        if const1 is not None and const2 is not None and const1.type == const2.type:
+            if (const1.value == const2.value) == (handler is op_jumpifeq):
+                return op_jump, args[:1]
+            return None
+    elif handler in WRITERS:
+        known = [constant(arg, state) for arg in args[1:]]
+        if handler is op_setchar:
+            known.insert(0, constant(args[0], state))
+        if known and None not in known:
+            result = evaluate(handler, known)
+            if result is not None:
+                return op_move, (args[0], result)
+    elif handler not in READERS:
+        return handler, args
+    start = 0 if handler in READERS else 1
+    return handler, args[:start] + tuple(constant(arg, state) or arg for arg in args[start:])
+
+def propagate(handler, args, state):
+    if not args or not isinstance(args[0], Reference) or args[0].frame != "GF":
+        return
+    if handler is op_defvar:
+        state[args[0].name] = UNSET
+    elif handler in WRITERS:
+        folded = simplify(handler, args, state)
+        result = VARYING
+        if folded is not None and folded[0] is op_move and isinstance(folded[1][1], Symbol):
+            result = folded[1][1]
+        state[args[0].name] = result
+
+def branches(code, ip, returns, state):
+    handler, args = code[ip]
+    if handler is op_jumpifeq or handler is op_jumpifneq:
+        folded = simplify(handler, args, state)
+        if folded is None:
+            return (ip + 1,)
+        elif folded[0] is op_jump:
+            return (args[0],)
+    return successors(code, ip, returns)
+
+def fold(code, orders=None):
+    end = len(code)
+    returns = set()
+    while True:
+        bounds, states = solve(code, tuple(returns), propagate, merge, branches)
+        calls = set()
+        for start in states:
+            last = bounds[start] - 1
+            if code[last][0] is op_call and last + 1 < end:
+                calls.add(last + 1)
+        if calls <= returns:
             break
-        iter = iter + 1
-        instr = instructions[iter]
+        returns |= calls
 
+    simplified = [None] * end
+    for start, state in states.items():
+        state = dict(state)
+        for ip in range(start, bounds[start]):
+            handler, args = code[ip]
+            simplified[ip] = simplify(handler, args, state)
+            propagate(handler, args, state)
 
-if __name__ == "__main__":
-    src, inputfile = arg_parse()
-    if inputfile != sys.stdin:
-        stdin = sys.stdin
-        sys.stdin = open(f"{inputfile}", "r")
+    while True:
+        kept = [ip for ip, instr in enumerate(simplified) if instr is not None]
+        starts = {ip: index for index, ip in enumerate(kept)}
+        position = [len(kept)] * (end + 1)
+        for ip in reversed(range(end)):
+            position[ip] = starts.get(ip, position[ip + 1])
+        redundant = [
+            ip for ip in kept
+            if simplified[ip][0] is op_jump and position[simplified[ip][1][0]] == position[ip + 1]
+        ]
+        if not redundant:
+            break
+        for ip in redundant:
+            simplified[ip] = None
+    if orders is not None:
+        orders.extend(ip + 1 for ip in kept)
+
+    folded = []
+    for ip in kept:
+        handler, args = simplified[ip]
+        if handler in JUMPS:
+            args = (position[args[0]],) + args[1:]
+        folded.append((handler, args))
+    return folded
+
+def checkpoint(handler, args, ip):
+    if handler is op_call or handler is op_return:
+        return True
+    if handler is op_fused:
+        handler, args = args[2], args[3]
+    return handler in JUMPS and args[0] <= ip
+
+def forward(handler, args, ip):
+    if handler is op_fused:
+        handler, args = args[2], args[3]
+    return handler in JUMPS and args[0] > ip + 1
+
+def guard(code, limits, orders=None):
+    guarded = []
+    for ip, (handler, args) in enumerate(code):
+        order = ip + 1 if orders is None else orders[ip]
+        if checkpoint(handler, args, ip):
+            handler, args = op_checkpoint, (order, handler, args)
+        elif forward(handler, args, ip):
+            handler, args = op_count, (order, handler, args)
+        elif (limits.strings is not None or limits.memory is not None) and (handler is op_concat or handler is op_concat_fast):
+            handler, args = op_grow, (order, handler, args)
+        guarded.append((handler, args))
+    return guarded
+
+def prepare(code, optimized=False, translated=False, limits=None, measured=False):
+    orders = None
+    if (optimized or translated) and not measured:
+        orders = []
+        code = fold(code, orders)
+    if optimized or translated:
+        code = infer(code)
+    if optimized and not translated and not measured:
+        steps = []
+        code = optimize(code, steps)
+        orders = [orders[step - 1] for step in steps]
+    if limits is not None:
+        code = guard(code, limits, orders)
+    if translated and not measured:
+        program = translate(code)
+        if program is not None:
+            code = program
+    return code, orders
+
+NATIVE = {
+    op_add_fast: ("{a} + {b}", "int"),
+    op_sub_fast: ("{a} - {b}", "int"),
+    op_mul_fast: ("{a} * {b}", "int"),
+    op_idiv_fast: ("divide({a}, {b})", "int"),
+    op_lt_fast: ("{a} < {b}", "bool"),
+    op_gt_fast: ("{a} > {b}", "bool"),
+    op_eq_fast: ("{a} == {b}", "bool"),
+    op_and_fast: ("{a} and {b}", "bool"),
+    op_or_fast: ("{a} or {b}", "bool"),
+    op_not_fast: ("not {a}", "bool"),
+    op_concat_fast: ("concat({a}, {b})", "string"),
+    op_strlen_fast: ("len({a})", "int"),
+}
+
+CONDITIONS = {
+    op_jumpifeq_fast: "==",
+    op_jumpifneq_fast: "!=",
+}
+
+BRANCHING = set(JUMPS) | {op_return, op_exit, op_undefined, op_checkpoint, op_count, op_fused}
+
+class Translator:
+    def __init__(self, code):
+        self.code = code
+        self.end = len(code)
+        self.names = {}
+        self.space = {
+            "exit": exit, "share": share, "concat": concat, "divide": divide, "Variable": Variable,
+        }
+        self.lines = []
+
+    def entries(self):
+        points = {0, self.end}
+        for ip, (handler, args) in enumerate(self.code):
+            inner, inner_args = (args[1], args[2]) if handler in GUARDS else (handler, args)
+            if inner in JUMPS:
+                points.add(inner_args[0])
+            if handler is op_call or (handler in BRANCHING and handler not in CONDITIONS and handler not in (op_jump, op_return)):
+                points.add(ip + 1)
+        return sorted(point for point in points if point <= self.end)
+
+    def var(self, ref):
+        if ref.name not in self.names:
+            self.names[ref.name] = f"v{len(self.names)}"
+        return self.names[ref.name]
+
+    def value(self, arg):
+        if isinstance(arg, Reference):
+            return self.var(arg) + ".value"
+        return repr(arg.value)
+
+    def typeof(self, arg):
+        if isinstance(arg, Reference):
+            return self.var(arg) + ".type"
+        return repr(arg.type)
+
+    def emit(self, depth, text):
+        self.lines.append("    " * depth + text)
+
+    def jump(self, depth, target):
+        self.emit(depth, f"ip = {target}")
+        self.emit(depth, "continue")
+
+    def instruction(self, depth, ip, handler, args):
+        if handler in NATIVE:
+            template, typ = NATIVE[handler]
+            values = [self.value(arg) for arg in args[1:]] + [None]
+            dst = self.var(args[0])
+            self.emit(depth, f"{dst}.value = " + template.format(a=values[0], b=values[1]))
+            self.emit(depth, f"{dst}.type = {typ!r}")
+        elif handler is op_move_fast:
+            dst, src = self.var(args[0]), args[1]
+            value = self.value(src)
+            if isinstance(src, Reference):
+                value = f"share({value})"
+            self.emit(depth, f"{dst}.value = {value}")
+            self.emit(depth, f"{dst}.type = {self.typeof(src)}")
+        elif handler in CONDITIONS:
+            target, src1, src2 = args
+            self.emit(depth, f"if {self.value(src1)} {CONDITIONS[handler]} {self.value(src2)}:")
+            self.jump(depth + 1, target)
+        elif handler is op_defvar and args[0].frame == "GF":
+            name = args[0].name
+            self.emit(depth, f"if {name!r} in g:")
+            self.emit(depth + 1, 'exit(52, "DEFVAR redefining a variable")')
+            self.emit(depth, f"{self.var(args[0])} = g[{name!r}] = Variable({name!r})")
+        elif handler is op_label:
+            pass
+        elif handler is op_jump:
+            self.jump(depth, args[0])
+            return False
+        elif handler is op_call:
+            self.emit(depth, f"calls.append({ip})")
+            self.jump(depth, args[0])
+            return False
+        elif handler is op_return:
+            self.emit(depth, "if not calls:")
+            self.emit(depth + 1, 'exit(56, "RETURN Return without call")')
+            self.jump(depth, "calls.pop() + 1")
+            return False
+        else:
+            self.space[f"h{ip}"] = handler
+            self.space[f"a{ip}"] = args
+            if handler in BRANCHING:
+                self.jump(depth, f"h{ip}(st, {ip}, *a{ip})")
+                return False
+            self.emit(depth, f"h{ip}(st, {ip}, *a{ip})")
+        return True
+
+    def block(self, depth, start, stop):
+        if start >= self.end:
+            self.emit(depth, "return")
+            return
+        for ip in range(start, stop):
+            handler, args = self.code[ip]
+            if not self.instruction(depth, ip, handler, args):
+                return
+        self.jump(depth, stop)
+
+    def tree(self, depth, points, lo, hi):
+        if hi - lo == 1:
+            stop = points[lo + 1] if lo + 1 < len(points) else self.end
+            self.block(depth, points[lo], stop)
+            return
+        mid = (lo + hi) // 2
+        self.emit(depth, f"if ip < {points[mid]}:")
+        self.tree(depth + 1, points, lo, mid)
+        self.emit(depth, "else:")
+        self.tree(depth + 1, points, mid, hi)
+
+    def source(self):
+        points = self.entries()
+        self.lines = []
+        self.emit(0, "def program(st):")
+        self.emit(1, "g = st.globals")
+        self.emit(1, "calls = st.calls")
+        self.emit(1, "ip = 0")
+        self.emit(1, "while True:")
+        self.tree(2, points, 0, len(points))
+        return "\n".join(self.lines) + "\n"
+
+def translate(code):
+    translator = Translator(code)
     try:
-        tree = ElementTree.parse(src)
-    except Exception:
+        source = translator.source()
+        exec(compile(source, "<ippcode>", "exec"), translator.space)
+    except (SyntaxError, RecursionError, MemoryError, ValueError, OverflowError):
+        return None
+    return translator.space["program"]
+
+def dump_operand(arg):
+    if isinstance(arg, Reference):
+        return ("var", arg.frame, arg.name)
+    elif isinstance(arg, Symbol):
+        return (arg.type, arg.value)
+    return arg
+
+def load_operand(arg):
+    if not isinstance(arg, tuple):
+        return arg
+    elif arg[0] == "var":
+        return Reference(arg[1], arg[2])
+    return Symbol(arg[0], arg[1])
+
+def dump_code(code):
+    table = [(NAMES[handler], tuple(dump_operand(arg) for arg in args)) for handler, args in code]
+    return marshal.dumps((CACHE_VERSION, table))
+
+def load_code(data):
+    version, table = marshal.loads(data)
+    if version != CACHE_VERSION:
+        raise ValueError("Cache version mismatch")
+    return [(HANDLERS[name], tuple(load_operand(arg) for arg in args)) for name, args in table]
+
+def load_program(source, cache=None):
+    if cache is None:
+        return decode(load(source))
+
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as file:
+                data = file.read()
+        else:
+            data = source.buffer.read()
+    except OSError:
         exit(31, "Invalid XML structure")
-    instructions = xml_parse(tree)
-    instructions.sort(key=operator.attrgetter("order"))
-    check_order(instructions)
-    interpret(instructions, inputfile)
+
+    path = os.path.join(cache, hashlib.sha256(data).hexdigest() + ".ippc")
+    try:
+        with open(path, "rb") as file:
+            return load_code(file.read())
+    except (OSError, ValueError, EOFError, TypeError, KeyError):
+        pass
+
+    code = decode(load(io.BytesIO(data)))
+    try:
+        os.makedirs(cache, exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            file.write(dump_code(code))
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+    return code
+
+def execute(st, code):
+    ip = 0
+    end = len(code)
+    while ip < end:
+        handler, args = code[ip]
+        ip = handler(st, ip, *args)
+
+class Interpreter:
+    def __init__(self, code, inp=None, out=None, err=None, limits=None, stats=None, trace=None, profile=None):
+        self.code = code
+        self.limits = limits
+        self.stats = stats
+        self.trace = trace
+        self.profile = profile
+        self.reset(inp, out, err)
+
+    def reset(self, inp=None, out=None, err=None):
+        if inp is None:
+            inp = Input(sys.stdin)
+        elif not isinstance(inp, (Input, MappedInput)):
+            inp = Input(inp)
+        if out is None:
+            out = Output(sys.stdout)
+        elif not isinstance(out, Output):
+            out = Output(out)
+        self.input = inp
+        self.output = out
+        self.error = err
+        self.state = None
+
+    def run(self):
+        st = self.state = State(self.output, self.input, self.error)
+        limits, stats, trace, profile = self.limits, self.stats, self.trace, self.profile
+        if limits is not None:
+            limits.start()
+            st.limits = limits
+        for instrument in (stats, trace, profile):
+            if instrument is not None:
+                instrument.start()
+        try:
+            if callable(self.code):
+                self.code(st)
+            elif stats is not None:
+                stats.execute(st, self.code)
+            elif trace is not None:
+                trace.execute(st, self.code)
+            elif profile is not None:
+                profile.execute(st, self.code)
+            else:
+                execute(st, self.code)
+        except Halt as e:
+            return e.code
+        except Error:
+            if trace is not None:
+                trace.dump(st)
+            raise
+        finally:
+            st.out.flush()
+            if stats is not None:
+                stats.write()
+            if profile is not None:
+                profile.write(st)
+            if limits is not None and limits.usage is not None:
+                limits.usage.write(st)
+        return 0
+
+def run(code, out=None, inp=None, stats=None, limits=None, trace=None, profile=None):
+    return Interpreter(code, inp, out, None, limits, stats, trace, profile).run()
+
+def interpret(instructions, inputfile):
+    return run(decode(instructions))
+
+def main():
+    args = arg_parse()
+    if args.input is sys.stdin:
+        inp = Input(sys.stdin)
+    else:
+        try:
+            inp = MappedInput(args.input)
+        except OSError:
+            exit(11, "Input file can't be opened")
+    code = load_program(args.source, args.cache)
+    stats = None if args.stats is None else Stats(args.stats)
+    profile = None
+    if args.profile is not None or args.speedscope is not None:
+        profile = Profile(args.profile, args.speedscope)
+    measured = stats is not None or profile is not None
+    translated = args.compile and args.trace is None
+    code, orders = prepare(code, args.optimize, translated, args.limits, measured)
+    trace = None if args.trace is None else Trace(args.trace, orders)
+    return run(code, Output(sys.stdout, args.flush), inp, stats, args.limits, trace, profile)
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Error as e:
+        print("ERROR: " + e.message, file=sys.stderr)
+        sys.exit(e.code)
@@ -0,0 +1,125 @@
+import io
+import os
+import sys
+import json
+import signal
+import argparse
+import threading
+import socketserver
+import multiprocessing
+
+import interpret
+
+INTERPRETER = None
+
+def init(code, limits=None):
+    global INTERPRETER
+    INTERPRETER = interpret.Interpreter(code, limits=limits)
+
+def execute(text):
+    out = io.StringIO()
+    err = io.StringIO()
+    INTERPRETER.reset(io.StringIO(text), out, err)
+    try:
+        rc = INTERPRETER.run()
+    except interpret.Error as e:
+        rc = e.code
+        err.write("ERROR: " + e.message + "\n")
+    return rc, out.getvalue(), err.getvalue()
+
+class Session:
+    def __init__(self, pool, stream):
+        self.pool = pool
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def submit(self, line):
+        try:
+            request = json.loads(line)
+            ident = request.get("id")
+            text = request.get("input", "")
+            if not isinstance(text, str):
+                raise ValueError("input must be a string")
+        except (ValueError, AttributeError) as e:
+            self.reply({"id": None, "error": f"Invalid request: {e}"})
+            return
+        callback = lambda result: self.respond(ident, result)
+        error = lambda e: self.reply({"id": ident, "error": str(e)})
+        self.pending.append(self.pool.apply_async(execute, (text,), callback=callback, error_callback=error))
+
+    def respond(self, ident, result):
+        rc, stdout, stderr = result
+        self.reply({"id": ident, "code": rc, "stdout": stdout, "stderr": stderr})
+
+    def reply(self, response):
+        data = json.dumps(response) + "\n"
+        with self.lock:
+            try:
+                self.stream.write(data)
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def wait(self):
+        for result in self.pending:
+            result.wait()
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stream = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        session = Session(self.server.pool, stream)
+        for line in io.TextIOWrapper(self.rfile, encoding="utf-8"):
+            if line.strip():
+                session.submit(line)
+        session.wait()
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        self.pool = pool
+        super().__init__(path, Handler)
+
+def arg_parse():
+    parser = argparse.ArgumentParser(description="Serve many runs of one loaded IPPcode program")
+    parser.add_argument("--source", nargs=1, required=True, help="XML Source File")
+    parser.add_argument("--socket", nargs=1, help="Unix socket path (default: requests on stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--cache", nargs=1, help="Compiled program cache directory")
+    parser.add_argument("--optimize", action="store_true", help="Fold constants, specialize type-safe instructions, drop labels and fuse common sequences")
+    interpret.limit_arguments(parser)
+    args = parser.parse_args()
+    args.source = args.source[0]
+    args.socket = None if args.socket is None else args.socket[0]
+    args.cache = None if args.cache is None else args.cache[0]
+    interpret.limit_values(args)
+    return args
+
+if __name__ == "__main__":
+    args = arg_parse()
+    code = interpret.load_program(args.source, args.cache)
+    code, orders = interpret.prepare(code, args.optimize, limits=args.limits)
+    pool = multiprocessing.Pool(args.workers, init, (code, args.limits))
+
+    if args.socket is None:
+        session = Session(pool, sys.stdout)
+        for line in sys.stdin:
+            if line.strip():
+                session.submit(line)
+        session.wait()
+    else:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = Server(args.socket, pool)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.unlink(args.socket)
+
+    pool.close()
+    pool.join()